@@ -94,6 +94,8 @@ else:
 
 user_data_dir = os.path.join(base_path, "Suno_Browser_Profile")
 CONFIG_FILE = os.path.join(base_path, "config.json")
+THUMB_CACHE_DIR = os.path.join(base_path, "thumb_cache")
+WAV_CACHE_FILE = os.path.join(base_path, "wav_urls.json")
 
 # --- DOWNLOADER TAB (Refactored for tab view) ---
 class DownloaderTab(tk.Frame):
@@ -110,8 +112,9 @@ class DownloaderTab(tk.Frame):
         # Map theme properties to self for compatibility with layout helpers
         self._apply_theme()
         
-        self.downloader = SunoDownloader()
+        self.downloader = SunoDownloader(thumb_cache_dir=THUMB_CACHE_DIR, wav_cache_file=WAV_CACHE_FILE)
         self.gui_queue = queue.Queue()
+        self._pending_progress = {}  # uuid -> latest download percent, applied by _process_gui_queue
         self.preloaded_songs = {}  # uuid -> song_data
         self.is_preloaded = False
         self.filter_settings = {}
@@ -573,6 +576,7 @@ class DownloaderTab(tk.Frame):
         self.save_lyrics_var.set(c.get("save_lyrics", True))
         self.download_wav_var.set(c.get("prefer_wav", False))
         self.rate_limit_var.set(c.get("download_delay", 0.5))
+        self.workers_var.set(c.get("max_workers", 3))
         self.max_pages_var.set(c.get("max_pages", 0))
         self.start_page_var.set(c.get("start_page", 0))
         self.track_folder_var.set(c.get("track_folder", False))
@@ -650,6 +654,7 @@ class DownloaderTab(tk.Frame):
         c.set("organize", self.organize_var.get())
         c.set("save_lyrics", self.save_lyrics_var.get())
         c.set("download_delay", self.rate_limit_var.get())
+        c.set("max_workers", self.workers_var.get())
         c.set("prefer_wav", self.download_wav_var.get())
         c.set("max_pages", self.max_pages_var.get())
         c.set("start_page", self.start_page_var.get())
@@ -723,7 +728,11 @@ class DownloaderTab(tk.Frame):
         self.gui_queue.put(('add_song', uuid, title, thumb_data, metadata))
         
     def on_song_updated_safe(self, uuid, status, progress):
-        self.gui_queue.put(('update_song', uuid, status, progress))
+        if status == "Downloading":
+            # Only the newest percent matters: overwrite instead of queueing every step
+            self._pending_progress[uuid] = progress
+        else:
+            self.gui_queue.put(('update_song', uuid, status, progress))
         
     def on_song_finished_safe(self, uuid, success, path):
         self.gui_queue.put(('finish_song', uuid, success, path))
@@ -748,9 +757,11 @@ class DownloaderTab(tk.Frame):
                         self.queue_pane.add_song(uuid, title, thumb, metadata=meta)
                     elif msg_type == 'update_song':
                         _, uuid, status, progress = item
+                        self._pending_progress.pop(uuid, None)
                         self.queue_pane.update_song(uuid, status=status, progress=progress)
                     elif msg_type == 'finish_song':
                         _, uuid, success, path = item
+                        self._pending_progress.pop(uuid, None)  # Don't let a late percent undo this
                         status = "Complete" if success else "Error"
                         self.queue_pane.update_song(uuid, status=status, filepath=path)
                     elif msg_type == 'found_song':
@@ -770,7 +781,12 @@ class DownloaderTab(tk.Frame):
                 except Exception as e:
                     import traceback
                     traceback.print_exc()
-                    
+            
+            # Apply the latest download progress per song (after add_song items above)
+            for uuid in list(self._pending_progress):
+                progress = self._pending_progress.pop(uuid, None)
+                if progress is not None:
+                    self.queue_pane.update_song(uuid, status="Downloading", progress=progress)
         except Exception as e:
             import traceback
             traceback.print_exc()
@@ -918,6 +934,7 @@ class DownloaderTab(tk.Frame):
             save_lyrics=self.save_lyrics_var.get(),
             prefer_wav=self.download_wav_var.get(),
             download_delay=self.rate_limit_var.get(),
+            page_delay=self.config_manager.get("page_delay", 0.0),  # config.json only: 0 = no page pacing
             filter_settings=self.filter_settings,
             organize_by_track=self.track_folder_var.get(),
             stems_only=self.filter_settings.get("stems_only"),
@@ -1011,10 +1028,12 @@ class DownloaderTab(tk.Frame):
             save_lyrics=self.save_lyrics_var.get(),
             prefer_wav=self.download_wav_var.get(),
             download_delay=self.rate_limit_var.get(),
+            page_delay=self.config_manager.get("page_delay", 0.0),  # config.json only: 0 = no page pacing
             filter_settings=self.filter_settings,
             organize_by_track=self.track_folder_var.get(),
             stems_only=self.filter_settings.get("stems_only"),
-            smart_resume=self.smart_resume_var.get()
+            smart_resume=self.smart_resume_var.get(),
+            max_workers=self.workers_var.get()
         )
         
         thread = threading.Thread(target=self.downloader.run, daemon=True)
@@ -1,11 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import os
-import json
 import threading
 import queue
 import time
-from suno_utils import read_song_metadata, save_lyrics_to_file, open_file
+from suno_utils import read_song_metadata, save_lyrics_to_file, open_file, load_json, save_json, normalize_tag_keys
 from theme_manager import ThemeManager
 
 
@@ -20,9 +19,12 @@ class LibraryTab(tk.Frame):
         self.tags_file = tags_file
         self.download_path = self.config_manager.get("path", "")
         self.all_songs = []  # Full song list
+        self._songs_by_norm = {}  # normpath(filepath) -> song, kept in sync with all_songs
+        self._search_keys = {}  # filepath -> lowercased "title\nartist", built once per scan for on_search
         self.filtered_songs = []  # Filtered by search
         self.tags = {}
         self.active_filters = {"keep": False, "trash": False, "star": False}
+        self._tree_rebuild_pending = False
         self._load_tags()
         
         # Caching & Threading
@@ -195,13 +197,12 @@ class LibraryTab(tk.Frame):
         """Load tags from file."""
         if self.tags_file and os.path.exists(self.tags_file):
             try:
-                with open(self.tags_file, 'r', encoding='utf-8') as f:
-                    self.tags = json.load(f)
+                self.tags = normalize_tag_keys(load_json(self.tags_file))
             except:
                 self.tags = {}
     
-    def reload_tags(self):
-        """Reload tags and update UI."""
+    def reload_tags(self, tags=None):
+        """Reload tags (from the given dict, or from file) and update UI."""
         try:
             # Check if tree exists and is ready
             if not hasattr(self, 'tree') or not self.tree:
@@ -216,8 +217,11 @@ class LibraryTab(tk.Frame):
                 if selected_filepath:
                     selected_filepath = os.path.normpath(selected_filepath)
             
-            # Reload tags from file
-            self._load_tags()
+            # Reload tags: the player may not have flushed its latest changes to file yet
+            if tags is not None:
+                self.tags = tags
+            else:
+                self._load_tags()
             
             # Re-apply filters to update the view (this rebuilds the tree)
             self.on_search()
@@ -276,19 +280,9 @@ class LibraryTab(tk.Frame):
             if not uuid:
                 return ""
             
-            # Try lookup with UUID first
+            # Tag keys are normalized on load, so a single lookup is enough
             tag = self.tags.get(uuid)
             
-            # If not found and UUID is a filepath, try with forward slashes (for compatibility)
-            if not tag and uuid and os.path.sep in uuid:
-                uuid_alt = uuid.replace('\\', '/')
-                tag = self.tags.get(uuid_alt)
-                if tag:
-                    # Update the tags dict to use normalized path for future lookups
-                    self.tags[uuid] = tag
-                    if uuid_alt in self.tags:
-                        del self.tags[uuid_alt]
-            
             if tag == "keep": return "👍"
             if tag == "trash": return "🗑️"
             if tag == "star": return "⭐"
@@ -301,8 +295,7 @@ class LibraryTab(tk.Frame):
         """Load metadata cache from file."""
         if self.cache_file and os.path.exists(self.cache_file):
             try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    self.cache = json.load(f)
+                self.cache = load_json(self.cache_file)
             except Exception as e:
                 print(f"Error loading cache: {e}")
                 self.cache = {}
@@ -311,8 +304,7 @@ class LibraryTab(tk.Frame):
         """Save metadata cache to file."""
         if self.cache_file:
             try:
-                with open(self.cache_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.cache, f)
+                save_json(self.cache_file, self.cache)
             except Exception as e:
                 print(f"Error saving cache: {e}")
 
@@ -374,6 +366,7 @@ class LibraryTab(tk.Frame):
                 
                 if msg_type == "batch":
                     self.all_songs.extend(data)
+                    self._index_songs(data)
                     self._add_songs_to_tree(data)
                     self.count_label.config(text=f"{len(self.all_songs)} songs")
                     
@@ -423,6 +416,8 @@ class LibraryTab(tk.Frame):
             self.tree.delete(item)
         
         self.all_songs = []
+        self._songs_by_norm = {}
+        self._search_keys = {}
         
         # Update path from config
         self.download_path = self.config_manager.get("path", "")
@@ -439,6 +434,17 @@ class LibraryTab(tk.Frame):
         threading.Thread(target=self._scan_thread, daemon=True).start()
         self._process_scan_queue()
     
+    def _index_songs(self, songs):
+        """Add songs to the normalized-filepath lookup."""
+        for song in songs:
+            self._songs_by_norm[os.path.normpath(song['filepath'])] = song
+            # "\n" can't be typed into the search box, so a query never matches across the two fields
+            self._search_keys[song['filepath']] = f"{song['title']}\n{song['artist']}".lower()
+
+    def get_song_by_path(self, filepath):
+        """Return the library song for an already-normalized filepath, or None."""
+        return self._songs_by_norm.get(filepath)
+
     def update_tree(self):
         """Update treeview with filtered songs."""
         # Clear existing
@@ -451,6 +457,21 @@ class LibraryTab(tk.Frame):
         # self.update_tree()
         self.count_label.config(text=f"{len(self.filtered_songs)} / {len(self.all_songs)} songs")
 
+    def update_tree_deferred(self):
+        """Schedule a single update_tree() for the next idle period."""
+        if not self._tree_rebuild_pending:
+            self._tree_rebuild_pending = True
+            self.after_idle(self._do_rebuild)
+
+    def _do_rebuild(self):
+        self._tree_rebuild_pending = False
+        self.update_tree()
+
+    def _mark_row_dirty(self, song):
+        """Refresh only the tag column of the row showing this song."""
+        for item in self.tree.tag_has(song['filepath'].replace('\\', '/')):
+            self.tree.set(item, "tag", self._get_tag_icon(song))
+
     def toggle_filter(self, tag, color):
         """Toggle a tag filter."""
         self.active_filters[tag] = not self.active_filters[tag]
@@ -488,22 +509,14 @@ class LibraryTab(tk.Frame):
                 if not uuid:
                     uuid = os.path.normpath(song.get('filepath', ''))
                 
-                # Look up tag (try normalized path first, then forward slashes)
-                tag = self.tags.get(uuid)
-                if not tag and uuid and os.path.sep in uuid:
-                    uuid_alt = uuid.replace('\\', '/')
-                    tag = self.tags.get(uuid_alt)
-                
-                if tag in active_tags:
+                if self.tags.get(uuid) in active_tags:
                     filtered_by_tags.append(song)
             candidates = filtered_by_tags
             
         # 2. Apply Search Query
         if query:
-            self.filtered_songs = [
-                song for song in candidates
-                if query in song['title'].lower() or query in song['artist'].lower()
-            ]
+            keys = self._search_keys
+            self.filtered_songs = [song for song in candidates if query in keys[song['filepath']]]
         else:
             self.filtered_songs = list(candidates)
         
@@ -689,6 +702,7 @@ class LibraryTab(tk.Frame):
         # Get lyrics - prioritize .txt file if it exists, then metadata
         current_lyrics = ''
         txt_path = os.path.splitext(filepath)[0] + ".txt"
+        txt_name = os.path.basename(txt_path)
         
         # First, check for .txt file (most reliable source)
         if os.path.exists(txt_path):
@@ -745,10 +759,8 @@ class LibraryTab(tk.Frame):
         
         def save():
             new_lyrics = text_area.get("1.0", "end-1c")
-            normalized_filepath = os.path.normpath(filepath)
             
-            # Save to .txt file first
-            txt_path = os.path.splitext(normalized_filepath)[0] + ".txt"
+            # Save to .txt file first (filepath/txt_path were normalized above)
             txt_saved = False
             try:
                 with open(txt_path, 'w', encoding='utf-8') as f:
@@ -761,7 +773,7 @@ class LibraryTab(tk.Frame):
             # Also save to audio file metadata
             metadata_saved = False
             if new_lyrics.strip():  # Only save to metadata if there's content
-                success, message = save_lyrics_to_file(normalized_filepath, new_lyrics)
+                success, message = save_lyrics_to_file(filepath, new_lyrics)
                 metadata_saved = success
                 if not success:
                     # Warn but don't fail if metadata save fails
@@ -779,7 +791,7 @@ class LibraryTab(tk.Frame):
                     
                     if saved_lyrics.replace('\r\n', '\n').strip() == new_lyrics.replace('\r\n', '\n').strip():
                         messagebox.showinfo("Success", "Lyrics saved successfully!\n\n" + 
-                                          f"Saved to: {os.path.basename(txt_path)}" + 
+                                          f"Saved to: {txt_name}" + 
                                           (f"\nAnd embedded in audio file metadata." if metadata_saved else ""))
                         dialog.destroy()
                     else:
@@ -818,7 +830,7 @@ class LibraryTab(tk.Frame):
         filepath = os.path.normpath(filepath)
         
         # Find song in all_songs to get UUID
-        song = next((s for s in self.all_songs if os.path.normpath(s['filepath']) == filepath), None)
+        song = self.get_song_by_path(filepath)
         if not song:
             # Try using filepath as UUID if song not found
             uuid = filepath
@@ -832,17 +844,21 @@ class LibraryTab(tk.Frame):
             if uuid in self.tags:
                 del self.tags[uuid]
         
-        # Save tags
-        if self.tags_file:
+        # Save tags: the player owns tags.json and writes it from its tag writer thread
+        if self.player_widget:
+            self.player_widget.set_tag(uuid, tag)
+        elif self.tags_file:
             try:
-                with open(self.tags_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.tags, f)
+                save_json(self.tags_file, self.tags)
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save tag: {e}")
                 return
         
-        # Update UI
-        self.update_tree()
+        # Update UI: an active tag filter may hide/show the row, otherwise just repaint it
+        if song and not any(self.active_filters.values()):
+            self._mark_row_dirty(song)
+        else:
+            self.update_tree_deferred()
         
         # Show confirmation
         tag_name = {"keep": "👍 Keep", "star": "⭐ Star", "trash": "🗑️ Trash"}.get(tag, tag)
@@ -2,12 +2,13 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from PIL import Image, ImageTk
 import os
-import json
 import sys
+import traceback
 from library_tab import LibraryTab
 from player_widget import PlayerWidget
 from downloader_tab import DownloaderTab
 from config_manager import ConfigManager
+from suno_utils import load_json, save_json
 
 sys.setrecursionlimit(5000) # Workaround for Tkinter recursion issue
 
@@ -19,6 +20,9 @@ CONFIG_FILE = os.path.join(base_path, "config.json")
 CACHE_FILE = os.path.join(base_path, "library_cache.json")
 TAGS_FILE = os.path.join(base_path, "tags.json")
 
+# Pre-scaled copies of resources/splash.png (width, height) shipped in resources/
+SPLASH_VARIANTS = ((1100, 613), (1920, 1070))
+
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -63,6 +67,7 @@ class SunoSyncApp(tk.Tk):
         
         # Hide window initially to show splash first
         self.withdraw()
+        self._window_shown = False
         
         # Make window borderless (remove title bar)
         self.overrideredirect(True)
@@ -92,24 +97,23 @@ class SunoSyncApp(tk.Tk):
             self.downloader = DownloaderTab(self.notebook, config_manager=self.config_manager)
             self.notebook.add(self.downloader, text="  Downloader  ")
             
-            # Tab 2: Library
-            self.library = LibraryTab(self.notebook, config_manager=self.config_manager, cache_file=CACHE_FILE, tags_file=TAGS_FILE)
-            self.notebook.add(self.library, text="  Library  ")
+            # Tab 2: Library (built on first view, see _ensure_tab_built)
+            self.library = None
+            self.library_frame = tk.Frame(self.notebook, bg=self.bg_dark)
+            self.notebook.add(self.library_frame, text="  Library  ")
+            self.notebook.bind("<<NotebookTabChanged>>", self._ensure_tab_built)
             
             # Player widget (bottom, fixed height)
             self.player = PlayerWidget(main_frame)
             self.player.set_tags_file(TAGS_FILE)
-            self.player.set_library_tab(self.library)  # Give player access to library for tagging
-            self.library.player_widget = self.player  # Give library access to player for UI updates
             
             # Use grid to ensure player gets fixed height
             self.player.grid(row=1, column=0, sticky="ew", padx=0, pady=0)
             # Player widget has pack_propagate(False) and height=160 set internally
             self.player.config(height=160)
             
-            # Connect Library to Player
-            self.library.bind("<<PlaySong>>", self.on_play_song)
-            self.player.bind("<<TagsUpdated>>", lambda e: self.on_tags_updated(e))
+            # Connect Player events
+            self.player.bind("<<TagsUpdated>>", self.on_tags_updated)
             self.player.bind("<<TrackChanged>>", self.on_track_changed)
             
             # Connect Downloader to Library (refresh on download complete)
@@ -133,7 +137,6 @@ class SunoSyncApp(tk.Tk):
             
         except Exception as e:
             # Show error dialog if initialization fails
-            import traceback
             error_msg = f"Failed to initialize application:\n{e}\n\n{traceback.format_exc()}"
             print(error_msg)
             try:
@@ -144,11 +147,8 @@ class SunoSyncApp(tk.Tk):
     
     def _show_window_with_splash(self):
         """Show window and then display splash screen."""
-        # Show the window
+        # Show the window (raised/focused once, after the splash, by _finalize_window_visibility)
         self.deiconify()
-        self.update_idletasks()
-        self.lift()
-        self.focus_force()
         
         # Show splash screen after window is visible
         self.after(50, self.show_splash)
@@ -158,9 +158,7 @@ class SunoSyncApp(tk.Tk):
         splash_path = resource_path("resources/splash.png")
         if not os.path.exists(splash_path):
             # If splash doesn't exist, just show the window
-            self.update_idletasks()
-            self.lift()
-            self.focus_force()
+            self._finalize_window_visibility()
             return
             
         # Create overlay frame that covers the entire window
@@ -181,12 +179,19 @@ class SunoSyncApp(tk.Tk):
             scale = min(win_width / img_width, win_height / img_height) if win_width > 0 and win_height > 0 else 1.0
             
             # If window is too small, use a minimum size
+            new_width, new_height = img_width, img_height
             if scale > 1.0 or win_width < 600:
                 new_width = max(600, int(img_width * scale))
                 new_height = max(400, int(img_height * scale))
-                pil_img = pil_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
             
-            img = ImageTk.PhotoImage(pil_img)
+            # Prefer a PNG that already has the right size: Tk decodes it natively, no PIL resample
+            variant_path = self._find_splash_variant(splash_path, img_width, img_height, new_width, new_height)
+            if variant_path:
+                img = tk.PhotoImage(file=variant_path)
+            else:
+                # Bilinear is plenty for a splash that is only visible for 2 seconds
+                pil_img = pil_img.resize((new_width, new_height), Image.Resampling.BILINEAR)
+                img = ImageTk.PhotoImage(pil_img)
             
             # Center the image
             lbl = tk.Label(splash_frame, image=img, bg="black")
@@ -198,20 +203,12 @@ class SunoSyncApp(tk.Tk):
                     font=("Segoe UI", 12, "bold"))
             version_label.place(relx=0.95, rely=0.95, anchor="se")
             
-            # Make sure window is visible
-            self.update_idletasks()
-            self.lift()
-            self.focus_force()
-            
         except Exception as e:
             print(f"Splash error: {e}")
-            import traceback
             traceback.print_exc()
             splash_frame.destroy()
             # Still show the window even if splash fails
-            self.update_idletasks()
-            self.lift()
-            self.focus_force()
+            self._finalize_window_visibility()
             return
 
         def end_splash():
@@ -220,14 +217,33 @@ class SunoSyncApp(tk.Tk):
             except:
                 pass
             # Ensure main window is visible after splash
-            self.update_idletasks()
-            self.lift()
-            self.focus_force()
+            self._finalize_window_visibility()
             self.check_changelog()
             
         # Show splash for 2 seconds
         self.after(2000, end_splash)
 
+    def _finalize_window_visibility(self):
+        """Raise and focus the main window once the splash is done."""
+        if self._window_shown:
+            return
+        self._window_shown = True
+        self.update_idletasks()
+        self.lift()
+        self.focus_force()
+
+    @staticmethod
+    def _find_splash_variant(splash_path, img_width, img_height, width, height):
+        """Return a splash PNG within a few pixels of width x height, or None."""
+        if abs(width - img_width) < 4 and abs(height - img_height) < 4:
+            return splash_path
+        w, h = min(SPLASH_VARIANTS, key=lambda v: abs(v[0] - width))
+        if abs(w - width) < 4 and abs(h - height) < 4:
+            variant_path = resource_path(f"resources/splash_{w}x{h}.png")
+            if os.path.exists(variant_path):
+                return variant_path
+        return None
+
     def check_changelog(self):
         """Show changelog on first launch of new version."""
         current_version = "2.0"
@@ -237,9 +253,8 @@ class SunoSyncApp(tk.Tk):
         
         if os.path.exists(state_file):
             try:
-                with open(state_file, "r") as f:
-                    data = json.load(f)
-                    last_version = data.get("version")
+                data = load_json(state_file)
+                last_version = data.get("version")
             except:
                 pass
         
@@ -263,18 +278,16 @@ class SunoSyncApp(tk.Tk):
             # Save new version
             data["version"] = current_version
             try:
-                with open(state_file, "w") as f:
-                    json.dump(data, f)
+                save_json(state_file, data)
             except:
                 pass
 
     def load_window_state(self):
         try:
             if os.path.exists("window_state.json"):
-                with open("window_state.json", "r") as f:
-                    data = json.load(f)
-                    geometry = data.get("geometry", "1100x750")
-                    self.geometry(geometry)
+                data = load_json("window_state.json")
+                geometry = data.get("geometry", "1100x750")
+                self.geometry(geometry)
             else:
                 self.geometry("1100x750")
                 self.center_window()
@@ -355,16 +368,31 @@ class SunoSyncApp(tk.Tk):
         self._drag_start_y = event.y_root
 
     def on_close(self):
+        self.player.flush_tags(wait=True)
+        self.downloader.downloader.close()
         try:
-            with open("window_state.json", "w") as f:
-                json.dump({"geometry": self.geometry()}, f)
+            save_json("window_state.json", {"geometry": self.geometry()})
         except:
             pass
         self.destroy()
 
+    def _ensure_tab_built(self, event=None):
+        """Build the Library tab the first time it is shown."""
+        if self.library is None and self.notebook.select() == str(self.library_frame):
+            self._build_library_tab()
+
+    def _build_library_tab(self):
+        """Create LibraryTab inside its placeholder frame and wire it to the player."""
+        self.library = LibraryTab(self.library_frame, config_manager=self.config_manager, cache_file=CACHE_FILE, tags_file=TAGS_FILE)
+        self.library.pack(fill="both", expand=True)
+        self.player.set_library_tab(self.library)  # Give player access to library for tagging
+        self.library.player_widget = self.player  # Give library access to player for UI updates
+        self.library.bind("<<PlaySong>>", self.on_play_song)
+
     def on_download_complete(self, success):
         """Refresh library when downloads complete."""
-        if success:
+        # Not built yet: it will scan the folder when first shown
+        if success and self.library is not None:
             self.library.refresh_library()
     
     def on_play_song(self, event):
@@ -375,47 +403,33 @@ class SunoSyncApp(tk.Tk):
 
     def on_tags_updated(self, event):
         """Handle tags updated event from player."""
-        try:
-            # Use after() to ensure we're in the main thread
-            if hasattr(self, 'library') and self.library:
-                # Use a longer delay to ensure any ongoing operations complete
-                self.after(200, self._safe_reload_tags)
-        except Exception as e:
-            print(f"Error in on_tags_updated: {e}")
-            import traceback
-            traceback.print_exc()
+        # Use a longer delay to ensure any ongoing operations complete
+        self.after(200, self._safe_reload_tags)
     
     def _safe_reload_tags(self):
         """Safely reload tags in library."""
+        if self.library is None:
+            return
         try:
-            if hasattr(self, 'library') and self.library and hasattr(self.library, 'reload_tags'):
-                self.library.reload_tags()
+            self.library.reload_tags(self.player.tags)
         except Exception as e:
             print(f"Error in _safe_reload_tags: {e}")
-            import traceback
             traceback.print_exc()
     
     def on_track_changed(self, event):
         """Handle track change from player."""
-        try:
-            if hasattr(self.player, 'current_file') and self.player.current_file:
-                # Use after() to ensure we're in the main thread and UI is ready
-                self.after(50, lambda: self._update_library_selection())
-        except Exception as e:
-            print(f"Error in on_track_changed: {e}")
-            import traceback
-            traceback.print_exc()
+        if self.player.current_file and self.library is not None:
+            # Use after() to ensure UI is ready
+            self.after(50, self._update_library_selection)
     
     def _update_library_selection(self):
         """Update library selection to match currently playing song."""
         try:
-            if hasattr(self.player, 'current_file') and self.player.current_file:
+            if self.player.current_file:
                 # Normalize the filepath before selecting
-                filepath = os.path.normpath(self.player.current_file)
-                self.library.select_song(filepath)
+                self.library.select_song(os.path.normpath(self.player.current_file))
         except Exception as e:
             print(f"Error in _update_library_selection: {e}")
-            import traceback
             traceback.print_exc()
 
 
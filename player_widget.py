@@ -1,16 +1,23 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 try:
     import vlc
     VLC_AVAILABLE = True
 except (ImportError, OSError):
     VLC_AVAILABLE = False
 import os
-from threading import Thread
-import time
-import json
+from threading import Thread, Lock
+import queue
+import traceback
 import random
-from suno_utils import open_file
+import functools
+from suno_utils import open_file, load_json, save_json, normalize_tag_keys
+
+
+@functools.lru_cache(maxsize=1)
+def _get_vlc_instance():
+    """Create the process-wide VLC instance once; loading its plugins is slow."""
+    return vlc.Instance('--no-xlib')  # Headless mode
 
 
 class PlayerWidget(tk.Frame):
@@ -19,11 +26,11 @@ class PlayerWidget(tk.Frame):
     def __init__(self, parent, **kwargs):
         super().__init__(parent, **kwargs)
         
-        # VLC instance
-        # VLC instance
+        # VLC instance (shared by all players)
+        self.instance = None
         if VLC_AVAILABLE:
             try:
-                self.instance = vlc.Instance('--no-xlib')  # Headless mode
+                self.instance = _get_vlc_instance()
                 self.player = self.instance.media_player_new()
             except Exception as e:
                 # VLC not available or failed to initialize
@@ -33,17 +40,44 @@ class PlayerWidget(tk.Frame):
         
         # Player state
         self.current_file = None
+        self._media = None
         self.is_playing = False
         self.duration = 0
+        # Last values written to the seek bar / time labels, to skip no-op Tk writes
+        self._last_seek_pct = -1
+        self._last_time_str = ""
+        self._last_duration_str = ""
+        # Slider drags are coalesced: only the latest value in each 30 ms window reaches VLC
+        self._seek_pending = None
+        self._volume_pending = None
+        self._seek_dragging = False
+        self._update_after_id = None  # Pending after() of the _update_ui tick
+        self._reload_position = None  # ms to restore once a reloaded media is playing
+        self._media_stale = False  # Repeat mode changed while paused/stopped: rebuild the media on resume
+        self._vlc_events = False  # True once VLC position/end events are attached
+        self._vlc_queue = queue.Queue()  # (kind, value) posted by VLC threads, drained by _update_ui
         self.playlist = []
+        self._playlist_paths = []  # Normalized filepath of each playlist entry
+        self._playlist_labels = []  # (title, folder) shown for each playlist entry
         self.current_index = -1
         self.tags = {}
         self.tags_file = None
+        self._tags_dirty = False
+        self._tags_flush_scheduled = False
+        # Tag file writes happen on a background thread; only the newest snapshot is kept
+        self._tags_version = 0
+        self._tags_written_version = 0
+        self._tags_queue = queue.Queue(maxsize=1)
+        self._tags_write_lock = Lock()
+        self._tags_error = None  # Set by the writer thread when a save fails; reported by _update_ui
+        Thread(target=self._tag_writer, daemon=True).start()
         self.library_tab = None  # Reference to library tab for tag operations
         
         # Playback modes
         self.shuffle_mode = False
         self.repeat_mode = 0  # 0: Off, 1: All, 2: One
+        self._shuffle_order = []  # Playlist indices in shuffled play order
+        self._shuffle_pos = -1
         
         # Theme colors
         self.bg_dark = "#1a1a1a"
@@ -60,6 +94,7 @@ class PlayerWidget(tk.Frame):
         self.config(height=160)  # Increased height for better visibility
         
         self.create_widgets()
+        self._attach_player_events()
         self.start_update_loop()
     
     def create_widgets(self):
@@ -166,13 +201,13 @@ class PlayerWidget(tk.Frame):
         
         self.tag_btns = {}
         tags = [("👍", "keep", "#22c55e"), ("🗑️", "trash", "#ef4444"), ("⭐", "star", "#eab308")]
+        self.tag_colors = {tag: color for _, tag, color in tags}
         
-        for icon, tag, color in tags:
+        for icon, tag, _ in tags:
             btn = tk.Button(tag_frame, text=icon, **btn_style,
                            command=lambda t=tag: self.toggle_tag(t))
             btn.pack(side=tk.LEFT, padx=2)
             self.tag_btns[tag] = btn
-            self.tag_colors = {tag: color for _, tag, color in tags}
             
         # Seek bar frame
         seek_frame = tk.Frame(center_frame, bg=self.bg_card)
@@ -191,6 +226,9 @@ class PlayerWidget(tk.Frame):
                                      variable=self.seek_var,
                                      command=self.on_seek)
         self.seek_slider.pack(side=tk.LEFT, fill="x", expand=True)
+        # Don't pull the slider out from under the user while they drag it
+        self.seek_slider.bind("<ButtonPress-1>", lambda e: setattr(self, '_seek_dragging', True))
+        self.seek_slider.bind("<ButtonRelease-1>", self._on_seek_release)
         
         # Duration time
         self.duration_label = tk.Label(seek_frame, text="0:00",
@@ -210,32 +248,83 @@ class PlayerWidget(tk.Frame):
     def _load_tags(self):
         if self.tags_file and os.path.exists(self.tags_file):
             try:
-                with open(self.tags_file, 'r', encoding='utf-8') as f:
-                    self.tags = json.load(f)
+                self.tags = normalize_tag_keys(load_json(self.tags_file))
             except:
                 self.tags = {}
 
     def _save_tags(self):
-        if self.tags_file:
+        """Mark tags as changed and schedule one debounced flush to disk."""
+        self._tags_dirty = True
+        if not self._tags_flush_scheduled:
+            self._tags_flush_scheduled = True
+            self.after(500, self.flush_tags)
+
+    def flush_tags(self, wait=False):
+        """
+        Hand changed tags to the writer thread.
+        With wait=True the latest tags are written on the calling thread instead (used on close).
+        """
+        self._tags_flush_scheduled = False
+        if not self.tags_file:
+            return
+        if self._tags_dirty:
+            self._tags_dirty = False
+            self._tags_version += 1
+        elif not wait:
+            return
+        
+        snapshot = (self._tags_version, dict(self.tags))
+        if wait:
+            self._write_tags(snapshot)
+            return
+        
+        # Replace any snapshot the writer hasn't picked up yet
+        try:
+            self._tags_queue.get_nowait()
+        except queue.Empty:
+            pass
+        self._tags_queue.put_nowait(snapshot)
+
+    def _tag_writer(self):
+        """Background thread: write tag snapshots to disk. Never touches widgets."""
+        while True:
+            self._write_tags(self._tags_queue.get())
+
+    def _write_tags(self, snapshot):
+        version, tags = snapshot
+        with self._tags_write_lock:
+            if version <= self._tags_written_version:
+                return  # A newer (or identical) snapshot is already on disk
             try:
                 # Ensure directory exists
                 tags_dir = os.path.dirname(self.tags_file)
                 if tags_dir and not os.path.exists(tags_dir):
                     os.makedirs(tags_dir, exist_ok=True)
                 
-                with open(self.tags_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.tags, f, indent=2)
+                save_json(self.tags_file, tags)
+                self._tags_written_version = version
             except Exception as e:
                 print(f"Error saving tags to {self.tags_file}: {e}")
-                import traceback
                 traceback.print_exc()
-                raise  # Re-raise so toggle_tag can catch it
+                self._tags_error = f"Failed to save tags to {self.tags_file}:\n{e}"
+
+    def _report_tags_error(self):
+        """Show a failed background tag save to the user. Must run on main thread."""
+        error_msg = self._tags_error
+        if error_msg:
+            self._tags_error = None
+            messagebox.showerror("Tag Error", error_msg)
 
     def set_playlist(self, songs, start_index=0):
         """Set the current playlist and start playing."""
-        self.playlist = songs
+        # Copy: the library sorts its list in place, which must not reorder the queue underneath us
+        self.playlist = list(songs)
+        self._playlist_paths = [os.path.normpath(song['filepath']) for song in self.playlist]
+        self._playlist_labels = [self._file_labels(path) for path in self._playlist_paths]
         self.current_index = start_index
-        if 0 <= self.current_index < len(self.playlist):
+        if self.shuffle_mode:
+            self._build_shuffle_order()
+        if self._current_song() is not None:
             self.play_song_at_index(self.current_index)
 
     def play_song_at_index(self, index):
@@ -246,17 +335,22 @@ class PlayerWidget(tk.Frame):
         self.current_index = index
         song = self.playlist[index]
         
-        # Normalize filepath before playing
-        filepath = os.path.normpath(song['filepath'])
-        
-        # Play the file
-        success = self.play_file(filepath)
+        # Play the file (path was normalized in set_playlist)
+        # The library scan already found the file, so play_file can skip its existence check
+        success = self.play_file(self._playlist_paths[index], normalized=True,
+                                 labels=self._playlist_labels[index], verified=True)
         
         if success:
             self.update_tag_ui(song.get('id'))
             
-            # Emit track changed event after a small delay to ensure current_file is set
-            self.after(100, lambda: self.event_generate("<<TrackChanged>>"))
+            # Post from the event loop once idle, so listeners run after this call has returned
+            self.after_idle(self.event_generate, "<<TrackChanged>>")
+
+    def _current_song(self):
+        """Return the playlist entry at current_index, or None if the index is out of range."""
+        playlist = self.playlist
+        index = self.current_index
+        return playlist[index] if 0 <= index < len(playlist) else None
 
     def set_library_tab(self, library_tab):
         """Set reference to library tab for tag operations."""
@@ -266,41 +360,21 @@ class PlayerWidget(tk.Frame):
         """Toggle a tag for the current song (playing or selected in library)."""
         # Try to get song from currently playing track
         uuid = None
-        filepath = None
         
-        if self.current_index >= 0 and self.current_index < len(self.playlist):
+        song = self._current_song()
+        if song is not None:
             # Song is playing
-            song = self.playlist[self.current_index]
-            uuid = song.get('id')
-            filepath = song.get('filepath')
-        elif hasattr(self, 'library_tab') and self.library_tab:
+            uuid = song.get('id') or self._playlist_paths[self.current_index]
+        elif self.library_tab:
             # Try to get from library selection
             filepath = self.library_tab.get_selected_filepath()
             if filepath:
-                # Normalize filepath for comparison
-                filepath = os.path.normpath(filepath)
-                # Find song in library to get UUID (normalize both for comparison)
-                song = next((s for s in self.library_tab.all_songs if os.path.normpath(s.get('filepath', '')) == filepath), None)
-                if song:
-                    uuid = song.get('id') or os.path.normpath(song.get('filepath', ''))
-                else:
-                    uuid = filepath
+                uuid = self._resolve_song_uuid(os.path.normpath(filepath))
         
-        if not uuid and not filepath:
+        if not uuid:
             # No song available
-            import tkinter.messagebox as messagebox
             messagebox.showinfo("No Song Selected", "Please select a song from the library or play a song first.")
             return
-        
-        if not uuid:
-            uuid = os.path.normpath(filepath) if filepath else None
-            
-        if not uuid:
-            return
-            
-        # Normalize UUID for consistent lookup
-        if os.path.sep in uuid:
-            uuid = os.path.normpath(uuid)
             
         current_tag = self.tags.get(uuid)
         
@@ -312,76 +386,72 @@ class PlayerWidget(tk.Frame):
             # Set tag
             self.tags[uuid] = tag
         
-        try:
-            self._save_tags()
-            self.update_tag_ui(uuid)
-            
-            # Notify library to update UI (use after() with delay to ensure thread safety)
-            self.after(100, lambda: self.event_generate("<<TagsUpdated>>"))
-        except Exception as e:
-            import tkinter.messagebox as messagebox
-            import traceback
-            error_msg = f"Error saving tag: {e}\n\n{traceback.format_exc()}"
-            messagebox.showerror("Tag Error", error_msg)
-            print(f"TAG ERROR: {error_msg}")
+        # Written by the tag writer thread; a failure is reported from _update_ui
+        self._save_tags()
+        self.update_tag_ui(uuid)
+        
+        # Notify library to update UI once the event loop is idle
+        self.after_idle(self.event_generate, "<<TagsUpdated>>")
+
+    def set_tag(self, uuid, tag):
+        """Set (or with a falsy tag, remove) the tag of a song, save it in the background and refresh the buttons."""
+        if tag:
+            self.tags[uuid] = tag
+        else:
+            self.tags.pop(uuid, None)
+        self._save_tags()
+        self.update_tag_ui()
+
+    def _resolve_song_uuid(self, filepath):
+        """Tag key for a normalized filepath: the library song's UUID, else the path itself."""
+        song = self.library_tab.get_song_by_path(filepath) if self.library_tab else None
+        return (song.get('id') if song else None) or filepath
 
     def update_tag_ui(self, uuid=None):
         """Update tag buttons state."""
         # If no UUID provided, try to get from current song or library selection
         if not uuid:
-            if self.current_index >= 0 and self.current_index < len(self.playlist):
-                song = self.playlist[self.current_index]
-                uuid = song.get('id') or song.get('filepath')
-            elif hasattr(self, 'library_tab') and self.library_tab:
+            song = self._current_song()
+            if song is not None:
+                uuid = song.get('id') or self._playlist_paths[self.current_index]
+            elif self.library_tab:
                 filepath = self.library_tab.get_selected_filepath()
                 if filepath:
-                    # Normalize filepath for comparison
-                    filepath = os.path.normpath(filepath)
-                    song = next((s for s in self.library_tab.all_songs if os.path.normpath(s.get('filepath', '')) == filepath), None)
-                    if song:
-                        uuid = song.get('id') or filepath
-                    else:
-                        uuid = filepath
-        
-        # Normalize UUID if it's a filepath
-        if uuid and os.path.sep in str(uuid):
-            uuid = os.path.normpath(uuid)
+                    uuid = self._resolve_song_uuid(os.path.normpath(filepath))
         
+        # Tag keys are normalized on load, so a single lookup is enough
         current_tag = self.tags.get(uuid) if uuid else None
         
-        # If we still don't have a tag, try with alternative path format
-        if not current_tag and uuid and os.path.sep in str(uuid):
-            uuid_alt = str(uuid).replace('\\', '/')
-            current_tag = self.tags.get(uuid_alt)
-            if current_tag:
-                # Update tags dict to use normalized path
-                self.tags[uuid] = current_tag
-                if uuid_alt in self.tags:
-                    del self.tags[uuid_alt]
-        
         for tag, btn in self.tag_btns.items():
             if tag == current_tag:
                 btn.config(bg=self.tag_colors[tag], fg="white")
             else:
                 btn.config(bg=self.bg_dark, fg=self.fg_primary)
 
-    def play_file(self, filepath):
-        """Play a specific file."""
+    @staticmethod
+    def _file_labels(filepath):
+        """Return the (title, folder) pair displayed while a file plays."""
+        title = os.path.splitext(os.path.basename(filepath))[0].replace('_', ' ')
+        return title, os.path.dirname(filepath)
+
+    def play_file(self, filepath, normalized=False, labels=None, verified=False):
+        """
+        Play a specific file. Pass normalized=True if filepath already went through os.path.normpath,
+        labels if its (title, folder) pair was precomputed, and verified=True if it is known to exist.
+        """
         # Normalize filepath FIRST before any operations
-        filepath = os.path.normpath(filepath)
+        if not normalized:
+            filepath = os.path.normpath(filepath)
         
         if not VLC_AVAILABLE:
-            import tkinter.messagebox as messagebox
             messagebox.showerror("VLC Not Available", "VLC is not installed or not available.\nPlease install python-vlc to use the audio player.")
             return False
         
         if not self.player or not self.instance:
-            import tkinter.messagebox as messagebox
             messagebox.showerror("Player Error", "VLC player failed to initialize.")
             return False
         
-        if not os.path.exists(filepath):
-            import tkinter.messagebox as messagebox
+        if not verified and not os.path.exists(filepath):
             messagebox.showerror("File Not Found", f"File does not exist:\n{filepath}")
             return False
         
@@ -392,53 +462,107 @@ class PlayerWidget(tk.Frame):
             # Stop current playback if any
             if self.is_playing:
                 self.player.stop()
+            # Events still queued from the previous track must not end or seek this one
+            self._vlc_queue = queue.Queue()
+            self._reload_position = None
+            self._media_stale = False
             
             # Load media
-            media = self.instance.media_new(filepath)
+            media = self._new_media(filepath)
             if not media:
-                import tkinter.messagebox as messagebox
                 messagebox.showerror("Media Error", f"Failed to load media from:\n{filepath}")
                 return False
                 
             self.player.set_media(media)
+            self._media = media
+            
+            # Parse asynchronously; duration is filled in by _on_media_parsed
+            self.duration = 0
+            media.event_manager().event_attach(vlc.EventType.MediaParsedChanged, self._on_media_parsed, media)
+            media.parse_with_options(vlc.MediaParseFlag.local, -1)
             
             # Start playback
             result = self.player.play()
             if result != 0:
-                import tkinter.messagebox as messagebox
                 messagebox.showerror("Playback Error", f"VLC play() returned error code: {result}\nFile: {filepath}")
                 return False
             
-            self.is_playing = True
-            self.play_btn.config(text="⏸")
-            
-            # Wait for media to parse (with timeout)
-            for _ in range(50):  # 5 seconds max
-                time.sleep(0.1)
-                length = self.player.get_length()
-                if length > 0:
-                    self.duration = length // 1000
-                    break
-            else:
-                self.duration = 0
+            self._set_playing(True)
             
             # Update UI
-            filename = os.path.basename(filepath)
-            title = os.path.splitext(filename)[0].replace('_', ' ')
+            title, folder = labels or self._file_labels(filepath)
             self.now_playing_label.config(text=title)
-            self.artist_label.config(text=f"Playing from: {os.path.dirname(filepath)}")
+            self.artist_label.config(text=f"Playing from: {folder}")
             
-            # Update duration label
-            self.duration_label.config(text=self.format_time(self.duration))
+            # Update duration label (0:00 until parsing finishes)
+            self._show_duration()
             return True
         except Exception as e:
-            import tkinter.messagebox as messagebox
-            import traceback
             error_msg = f"Failed to play file:\n{filepath}\n\nError: {e}\n\n{traceback.format_exc()}"
             messagebox.showerror("Playback Error", error_msg)
             print(f"PLAYBACK ERROR: {error_msg}")  # Also print to console
             return False
     
+    def _new_media(self, filepath):
+        """Create a VLC media; in Repeat One VLC loops it itself instead of us reopening the file."""
+        if self.repeat_mode == 2:
+            return self.instance.media_new(filepath, ':input-repeat=65535')
+        return self.instance.media_new(filepath)
+
+    def _reload_current_media(self):
+        """Swap the playing media for one with the current repeat option, keeping the position."""
+        if not self.player or not self.current_file:
+            return
+        if not self.is_playing:
+            # Resuming with play() would keep the old media's repeat option: toggle_playback swaps it
+            self._media_stale = True
+            return
+        self._swap_media()
+
+    def _swap_media(self):
+        """Start a fresh media for the current file with the current repeat option, at the same position."""
+        self._media_stale = False
+        position = self.player.get_time()
+        media = self._new_media(self.current_file)
+        self.player.set_media(media)
+        self._media = media
+        self.player.play()
+        if position > 0:
+            # A seek issued before the new input is playing is dropped: wait for it to start
+            self._reload_position = position
+            self.after(20, self._restore_reload_position)
+
+    def _restore_reload_position(self, tries=100):
+        """Restore the position of a reloaded media once VLC reports it playing. Main thread."""
+        if self._reload_position is None or not self.player:
+            return  # Applied already, or play_file started another track
+        if self.player.get_state() == vlc.State.Playing:
+            self.player.set_time(self._reload_position)
+            self._reload_position = None
+        elif tries > 0:
+            self.after(20, self._restore_reload_position, tries - 1)
+        else:
+            self._reload_position = None  # Never started (about 2 s): leave it where it is
+
+    def _on_media_parsed(self, event, media):
+        # VLC preparser thread: queue it for _update_ui, never touch Tk from here
+        self._vlc_queue.put(("parsed", media))
+
+    def _finalize_duration(self, media):
+        """Store the parsed duration of the current media. Must run on main thread."""
+        if media is not self._media:
+            return  # Track changed while parsing
+        length = media.get_duration()
+        if length > 0:
+            self.duration = length // 1000
+            self._show_duration()
+
+    def _show_duration(self):
+        duration_str = self.format_time(self.duration)
+        if duration_str != self._last_duration_str:
+            self._last_duration_str = duration_str
+            self.duration_label.config(text=duration_str)
+
     def toggle_playback(self):
         """Toggle play/pause."""
         if not self.player: return
@@ -448,22 +572,21 @@ class PlayerWidget(tk.Frame):
         
         if self.is_playing:
             self.player.pause()
-            self.is_playing = False
-            self.play_btn.config(text="▶")
+            self._set_playing(False)
         else:
-            self.player.play()
-            self.is_playing = True
-            self.play_btn.config(text="⏸")
+            if self._media_stale:
+                self._swap_media()
+            else:
+                self.player.play()
+            self._set_playing(True)
     
     def stop(self):
         """Stop playback."""
         if not self.player: return
 
         self.player.stop()
-        self.is_playing = False
-        self.play_btn.config(text="▶")
-        self.seek_var.set(0)
-        self.time_label.config(text="0:00")
+        self._set_playing(False)
+        self._set_progress(0, "0:00")
     
     def on_seek(self, value):
         """Handle seek slider change."""
@@ -473,27 +596,53 @@ class PlayerWidget(tk.Frame):
             return
         
         # Convert slider value (0-100) to position (0.0-1.0)
-        position = float(value) / 100.0
-        self.player.set_position(position)
+        if self._seek_pending is None:
+            self.after(30, self._apply_seek)
+        self._seek_pending = float(value) / 100.0
+    
+    def _apply_seek(self):
+        position, self._seek_pending = self._seek_pending, None
+        if position is not None and self.is_playing:
+            self.player.set_position(position)
     
     def on_volume_change(self, value):
         """Handle volume slider change."""
         if not self.player: return
 
-        volume = int(float(value))
-        self.player.audio_set_volume(volume)
+        if self._volume_pending is None:
+            self.after(30, self._apply_volume)
+        self._volume_pending = int(float(value))
+    
+    def _apply_volume(self):
+        volume, self._volume_pending = self._volume_pending, None
+        if volume is not None:
+            self.player.audio_set_volume(volume)
     
     def toggle_shuffle(self):
         """Toggle shuffle mode."""
         self.shuffle_mode = not self.shuffle_mode
         if self.shuffle_mode:
+            self._build_shuffle_order()
             self.shuffle_btn.config(fg=self.accent_purple)
         else:
             self.shuffle_btn.config(fg=self.fg_secondary)
 
+    def _build_shuffle_order(self):
+        """Shuffle the playlist indices once, with the current song first."""
+        self._shuffle_order = list(range(len(self.playlist)))
+        random.shuffle(self._shuffle_order)
+        self._shuffle_pos = -1
+        if self._current_song() is not None:
+            i = self._shuffle_order.index(self.current_index)
+            self._shuffle_order[0], self._shuffle_order[i] = self._shuffle_order[i], self._shuffle_order[0]
+            self._shuffle_pos = 0
+
     def toggle_repeat(self):
         """Toggle repeat mode: Off -> All -> One -> Off."""
         self.repeat_mode = (self.repeat_mode + 1) % 3
+        if self.repeat_mode in (0, 2):
+            # Entering or leaving Repeat One changes the media's loop option
+            self._reload_current_media()
         
         if self.repeat_mode == 0: # Off
             self.repeat_btn.config(text="🔁", fg=self.fg_secondary)
@@ -511,11 +660,15 @@ class PlayerWidget(tk.Frame):
             self.player.set_time(0)
             return
 
-        if self.shuffle_mode:
-            # Random previous isn't standard, usually we go back in history. 
-            # For simplicity, just random or previous index.
-            # Let's just go to previous index for now, shuffle usually only affects 'next'
-            pass
+        if self.shuffle_mode and len(self._shuffle_order) == len(self.playlist):
+            # Walk back through the shuffled order
+            if self._shuffle_pos <= 0:
+                if self.repeat_mode != 1: # Loop all
+                    return # Stop at start
+                self._shuffle_pos = len(self._shuffle_order)
+            self._shuffle_pos -= 1
+            self.play_song_at_index(self._shuffle_order[self._shuffle_pos])
+            return
             
         new_index = self.current_index - 1
         if new_index < 0:
@@ -529,18 +682,22 @@ class PlayerWidget(tk.Frame):
     def next_song(self):
         """Play next song."""
         if not self.playlist: return
-        
-        if self.repeat_mode == 2: # Repeat One
-            self.play_song_at_index(self.current_index)
-            return
 
         if self.shuffle_mode:
-            # Pick random index
-            new_index = random.randint(0, len(self.playlist) - 1)
-            # Try not to pick same song unless playlist is size 1
-            if len(self.playlist) > 1 and new_index == self.current_index:
-                new_index = (new_index + 1) % len(self.playlist)
-            self.play_song_at_index(new_index)
+            if len(self._shuffle_order) != len(self.playlist):
+                self._build_shuffle_order()
+            # Every song plays once before the order repeats
+            self._shuffle_pos += 1
+            if self._shuffle_pos >= len(self._shuffle_order):
+                if self.repeat_mode != 1: # Loop all
+                    self._shuffle_pos = len(self._shuffle_order) - 1
+                    return # Stop at end
+                self._build_shuffle_order()
+                # Don't start the new round with the song that just played
+                if len(self._shuffle_order) > 1:
+                    self._shuffle_order.append(self._shuffle_order.pop(0))
+                self._shuffle_pos = 0
+            self.play_song_at_index(self._shuffle_order[self._shuffle_pos])
             return
 
         new_index = self.current_index + 1
@@ -552,41 +709,138 @@ class PlayerWidget(tk.Frame):
                 
         self.play_song_at_index(new_index)
     
+    def _attach_player_events(self):
+        """Subscribe to VLC position/end events instead of polling for them."""
+        if not self.player:
+            return
+        try:
+            events = self.player.event_manager()
+            events.event_attach(vlc.EventType.MediaPlayerPositionChanged, self._on_vlc_position_changed)
+            events.event_attach(vlc.EventType.MediaPlayerEndReached, self._on_vlc_end_reached)
+            self._vlc_events = True
+        except Exception as e:
+            # Some VLC builds lack the event API: _update_ui falls back to fast polling
+            print(f"VLC events unavailable, polling instead: {e}")
+
+    # VLC callbacks run on a VLC thread: never touch Tk here (not even after_idle, which waits on
+    # the main loop while play_file may be waiting on this thread). Queue the event for _update_ui.
+    def _on_vlc_position_changed(self, event):
+        self._vlc_queue.put(("position", event.u.new_position))
+
+    def _on_vlc_end_reached(self, event):
+        self._vlc_queue.put(("end", None))
+
+    def _drain_vlc_events(self):
+        """Apply the events queued by VLC threads; only the newest position matters. Main thread."""
+        position = None
+        ended = False
+        while True:
+            try:
+                kind, value = self._vlc_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "position":
+                position = value
+            elif kind == "end":
+                ended = True
+            elif kind == "parsed":
+                self._finalize_duration(value)
+        if ended:
+            self._on_track_ended()
+        elif position is not None:
+            self._apply_position(position)
+
+    def _apply_position(self, position):
+        """Update seek bar and time label. Must run on main thread."""
+        if not self.is_playing or self.duration <= 0 or position < 0 or self._seek_dragging:
+            return
+        current_time = int(position * self.duration)
+        self._set_progress(int(position * 100), self.format_time(current_time))
+
+    def _set_playing(self, playing):
+        """Set playback state, touching the play button only when its icon changes."""
+        if playing != self.is_playing:
+            self.play_btn.config(text="⏸" if playing else "▶")
+        resumed = playing and not self.is_playing
+        self.is_playing = playing
+        if resumed:
+            self._update_ui_now()
+
+    def _on_seek_release(self, event):
+        self._seek_dragging = False
+        self._update_ui_now()
+
+    def _update_ui_now(self):
+        """Run the UI tick at the next idle moment instead of waiting out the slow paused/dragging delay."""
+        if self._update_after_id is not None:
+            self.after_cancel(self._update_after_id)
+        self._update_after_id = self.after_idle(self._update_ui)
+
+    # Widget writes below are left to Tk's own idle-time redraw: never call update() (or a forced
+    # update_idletasks()) from these per-tick paths, it only adds extra layout passes.
+    def _set_progress(self, pct, time_str):
+        """Write seek bar and time label, skipping values already displayed."""
+        if pct != self._last_seek_pct:
+            self._last_seek_pct = pct
+            self.seek_var.set(pct)
+        if time_str != self._last_time_str:
+            self._last_time_str = time_str
+            self.time_label.config(text=time_str)
+
+    def _on_track_ended(self):
+        """Advance to the next song. Must run on main thread."""
+        self._set_playing(False)
+        if self.repeat_mode == 2 and self.playlist:
+            # Repeat One loops inside VLC; only reached once its repeat count runs out
+            self.play_song_at_index(self.current_index)
+            return
+        self.next_song()  # Auto-play next
+
     def start_update_loop(self):
-        """Start the UI update loop using after() for thread safety."""
+        """Start the UI safety tick using after() for thread safety."""
         self._update_ui()
         
     def _update_ui(self):
-        """Update UI elements. Must run on main thread."""
-        if self.is_playing and self.duration > 0 and self.player:
+        """Apply queued VLC events, or poll VLC when its events are unavailable. Must run on main thread."""
+        self._update_after_id = None
+        self._report_tags_error()
+        try:
+            self._drain_vlc_events()
+        except Exception:
+            traceback.print_exc()
+        if self.is_playing and self.player:
             try:
-                # Update seek bar and time
-                position = self.player.get_position()
-                if position >= 0:
-                    current_time = int(position * self.duration)
-                    # Only update if not dragging (optional optimization, but simple set is fine)
-                    self.seek_var.set(int(position * 100))
-                    self.time_label.config(text=self.format_time(current_time))
-                
-                # Check if song ended
-                state = self.player.get_state()
-                if state == vlc.State.Ended:
-                    self.is_playing = False
-                    self.play_btn.config(text="▶")
-                    self.next_song()  # Auto-play next
+                if not self._vlc_events and self.player.get_state() == vlc.State.Ended:
+                    self._on_track_ended()
+                else:
+                    if self.duration == 0:
+                        # Parse event hasn't delivered a length yet; the player may already know it
+                        length = self.player.get_length()
+                        if length > 0:
+                            self.duration = length // 1000
+                            self._show_duration()
+                    if self.duration > 0 and not self._vlc_events:
+                        self._apply_position(self.player.get_position())
             except Exception:
                 pass
         
-        # Schedule next update
-        self.after(500, self._update_ui)
+        if self._update_after_id is not None:
+            return  # _update_ui_now was called during this tick and has already queued the next one
+        # Schedule next tick: fast polling only while playing without VLC events; otherwise a 1 s tick
+        # delivers queued events (the time label only shows seconds). Resume and drag end run it at once.
+        if self.is_playing and not self._seek_dragging and not self._vlc_events:
+            delay = 50
+        else:
+            delay = 1000
+        self._update_after_id = self.after(delay, self._update_ui)
     
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def format_time(seconds):
         """Format time as M:SS."""
         if seconds < 0:
             return "0:00"
-        mins = seconds // 60
-        secs = seconds % 60
+        mins, secs = divmod(seconds, 60)
         return f"{mins}:{secs:02d}"
 
 
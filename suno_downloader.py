@@ -1,26 +1,69 @@
 import os
+import shutil
 import time
 import traceback
 import requests
-from concurrent.futures import ThreadPoolExecutor
-from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 import threading
 import re
-
-from suno_utils import RateLimiter, get_downloaded_uuids, embed_metadata, sanitize_filename, get_unique_filename
+import random
+import hashlib
+import functools
+import bisect
+from collections import deque, OrderedDict
+from io import BytesIO
+from PIL import Image
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+from suno_utils import RateLimiter, create_http_session, build_uuid_cache, load_json, save_json, parse_json, embed_metadata, sanitize_filename, get_unique_filename
 
 GEN_API_BASE = "https://studio-api.prod.suno.com"
+DOWNLOAD_CHUNK_SIZE = 512 * 1024  # Bytes read from the socket per iteration (also bounds Stop latency)
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024  # Write buffer for the output file
+MAX_DOWNLOAD_WORKERS = 3  # Default number of parallel downloads
+MAX_WORKERS_LIMIT = 8  # Upper bound for the user setting: more mostly buys 429 backoff
+QUEUED_PER_WORKER = 2  # Submitted but unfinished downloads per worker
+THUMB_WORKERS = 4
+WAV_WORKERS = 2
+DETAIL_WORKERS = 8  # Concurrent clip detail refetches for clips listed without a prompt
+# Keep-alive connections per host: enough for every pool's threads at once (+1 for the page fetcher)
+HTTP_POOL_SIZE = MAX_WORKERS_LIMIT + THUMB_WORKERS + WAV_WORKERS + DETAIL_WORKERS + 1
+PROGRESS_INTERVAL = 0.1  # Seconds between progress signal batches
+# Audio is already compressed: fetch it as-is so nothing gets gzip-decoded on the way to disk
+IDENTITY_ENCODING = {"Accept-Encoding": "identity"}
+THUMB_CACHE_SIZE = 256  # Thumbnails kept in memory (~2-5 KB each at 40 px)
+THUMB_MAX_AGE = 7 * 24 * 3600  # Seconds before a cached thumbnail is revalidated with the server
+THUMB_MAX_BYTES = 8 * 1024 * 1024  # Larger cover downloads are refused
+THUMB_MAX_PIXELS = 4096 * 4096  # Checked from the image header before decoding
+PAGES_AHEAD = 2  # Feed pages scanned ahead of the page whose downloads are still running
+# Smart Resume: pages without new songs before stopping, by library size bucket
+RESUME_LIBRARY_SIZES = (100, 1000, 5000)
+RESUME_THRESHOLDS = (2, 5, 10, 20)
+# Dump raw playlist responses to the debug log (set SUNOSYNC_DEBUG_PLAYLIST=1 when a playlist parses empty)
+DEBUG_PLAYLIST = bool(os.environ.get("SUNOSYNC_DEBUG_PLAYLIST"))
+WAV_SAVE_DELAY = 2.0  # Seconds to coalesce WAV URL cache writes
+WAV_URL_KEYS = ("audio_url_wav", "wav_url", "wav_audio_url", "master_wav_url", "preview_wav_url")
+WAV_URL_RE = re.compile(r"http.*\.wav", re.IGNORECASE | re.DOTALL)  # Used with match(): must start with http
+PROJECT_TO_PLAYLIST_RE = re.compile(r"/api/project/([^?&]+)")  # Rewritten to /api/playlist/ID/ on a 404
+NON_ASCII_RE = re.compile(r'[^\x00-\x7F]+')  # e.g. an ellipsis pasted along with the token
 
 
 class Signal:
     """A simple signal implementation for observer pattern."""
     def __init__(self, arg_types=None):
-        self._subscribers = []
+        # Immutable tuple, replaced on connect: emit() iterates a snapshot without locking
+        self._subscribers = ()
+        self._lock = threading.Lock()
         self.arg_types = arg_types
 
     def connect(self, callback):
-        if callback not in self._subscribers:
-            self._subscribers.append(callback)
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers = self._subscribers + (callback,)
 
     def emit(self, *args):
         for callback in self._subscribers:
@@ -53,17 +96,52 @@ class SunoDownloader:
         "(woodwinds)", "(brass)", "(fx)", "(synth)", "(strings)", 
         "(percussion)", "(keyboard)", "(guitar)"
     ]
+    _STEM_RE = re.compile("|".join(re.escape(ind) for ind in STEM_INDICATORS), re.IGNORECASE)
+    _stem_automaton = None  # Built on first use when pyahocorasick is installed
+    # Keys that hold the clip list in project/playlist/feed responses, in priority order
+    _LIST_KEYS = ("project_clips", "playlist_clips", "clips", "items", "songs", "tracks")
+    _NESTED_LIST_KEYS = ("playlist_clips", "clips", "items")  # Inside a nested "playlist" object
 
-    def __init__(self):
+    def __init__(self, thumb_cache_dir=None, wav_cache_file=None):
         self.signals = DownloaderSignals()
+        # Resized thumbnails persist here across restarts (disabled when None)
+        self.thumb_cache_dir = thumb_cache_dir
+        if thumb_cache_dir:
+            os.makedirs(thumb_cache_dir, exist_ok=True)
+        # clip_id -> converted WAV URL, so a clip is only ever converted once (persisted when a file is given)
+        self.wav_cache_file = wav_cache_file
+        self._wav_url_cache = self._load_wav_url_cache()
+        self._wav_save_timer = None
+        self._wav_save_lock = threading.Lock()
         self.stop_event = threading.Event()
         self.config = {}
         self.rate_limiter = RateLimiter(0.0)
+        self.page_limiter = RateLimiter(0.0)
+        self._known_dirs = set()  # Folders already created during the current run
+        self._thumb_executor = ThreadPoolExecutor(max_workers=THUMB_WORKERS, thread_name_prefix="suno-thumb")  # Thumbnail fetches shared by all downloads
+        # WAV conversions are requested when a song is queued, so the server converts while earlier songs download
+        self._wav_executor = ThreadPoolExecutor(max_workers=WAV_WORKERS, thread_name_prefix="suno-wav")
+        self._wav_requests = {}  # clip_id -> future of the convert_wav POST (its monotonic time when accepted)
+        self._wav_lock = threading.Lock()
+        self._wav_convert_time = None  # Smoothed seconds from convert_wav POST to the WAV being ready
+        # Full clip details for songs listed without a prompt, refetched for the whole page at once
+        self._detail_executor = ThreadPoolExecutor(max_workers=DETAIL_WORKERS, thread_name_prefix="suno-detail")
+        self._detail_requests = {}  # clip_id -> future of the refetched metadata (None on failure)
+        self._detail_lock = threading.Lock()
+        self._thumb_cache = OrderedDict()  # (url, size) -> PNG bytes, least recently used first
+        self._thumb_lock = threading.Lock()
+        self._thumb_pending = {}  # (url, size) -> Future of a fetch in progress, shared by concurrent callers
+        # uuid -> latest download percent; written by download threads without locking
+        self._progress = {}
+        self._progress_lock = threading.Lock()  # Orders a flush against a song's final status
+        # One pooled session for all API, audio and thumbnail requests, shared by the worker threads
+        self.session = create_http_session(pool_maxsize=HTTP_POOL_SIZE)
 
     def configure(self, token, directory, max_pages, start_page, 
                   organize_by_month, embed_metadata_enabled, prefer_wav, download_delay, 
                   filter_settings=None, scan_only=False, target_songs=None, save_lyrics=True,
-                  organize_by_track=False, stems_only=False, smart_resume=False):
+                  organize_by_track=False, stems_only=False, smart_resume=False, page_delay=0.0,
+                  max_workers=MAX_DOWNLOAD_WORKERS):
         self.config = {
             "token": token,
             "directory": directory,
@@ -79,9 +157,14 @@ class SunoDownloader:
             "target_songs": target_songs or [], # List of dicts or UUIDs
             "organize_by_track": organize_by_track,
             "stems_only": stems_only,
-            "smart_resume": smart_resume
+            "smart_resume": smart_resume,
+            "page_delay": max(0.0, float(page_delay)),
+            "max_workers": min(MAX_WORKERS_LIMIT, max(1, int(max_workers)))
         }
-        self.rate_limiter = RateLimiter(self.config["download_delay"])
+        # Lets every download worker start at once, then holds the pace to one download per delay
+        self.rate_limiter = RateLimiter(self.config["download_delay"], burst=self.config["max_workers"])
+        # Separate limiter for feed pages: backs off on 429 and speeds up again on success
+        self.page_limiter = RateLimiter(self.config["page_delay"])
 
     def stop(self):
         self.stop_event.set()
@@ -89,6 +172,15 @@ class SunoDownloader:
     def is_stopped(self):
         return self.stop_event.is_set()
 
+    def close(self):
+        """Stop any run and release the pooled connections and thumbnail workers."""
+        self.stop()
+        self._thumb_executor.shutdown(wait=False, cancel_futures=True)
+        self._wav_executor.shutdown(wait=False, cancel_futures=True)
+        self._detail_executor.shutdown(wait=False, cancel_futures=True)
+        self._save_wav_url_cache()
+        self.session.close()
+
     def _log(self, message, msg_type="info", thumbnail_data=None):
         """Internal helper to emit log signals."""
         # Also print for debug window capture
@@ -98,30 +190,53 @@ class SunoDownloader:
             self.signals.thumbnail_fetched.emit(thumbnail_data, message)
 
     def run(self):
+        # Download threads only record progress; this pump turns it into song_updated signals
+        pump_done = threading.Event()
+        pump = threading.Thread(target=self._progress_pump, args=(pump_done,), daemon=True)
+        pump.start()
+        try:
+            self._run()
+        finally:
+            pump_done.set()
+            pump.join()
+
+    def _progress_pump(self, done):
+        """Emit the latest recorded percent of each downloading song every 100 ms."""
+        while not done.wait(PROGRESS_INTERVAL):
+            self._flush_progress()
+        self._flush_progress()
+
+    def _flush_progress(self):
+        with self._progress_lock:
+            for uuid in list(self._progress):
+                percent = self._progress.pop(uuid, None)
+                if percent is not None:
+                    self.signals.song_updated.emit(uuid, "Downloading", percent)
+
+    def _drop_progress(self, uuid):
+        """Discard unsent progress so it can't arrive after the song's final status."""
+        with self._progress_lock:
+            self._progress.pop(uuid, None)
+
+    def _run(self):
         self.stop_event.clear()
-        print(f"DEBUG: Starting download/preload run()")
-        print(f"DEBUG: Config keys: {list(self.config.keys())}")
         
         token = self.config.get("token", "").strip()
-        print(f"DEBUG: Token present: {bool(token)}, length: {len(token) if token else 0}")
         
         # Sanitize token: Remove any non-ASCII characters (e.g. ellipsis from copy-paste)
         if token:
-            token = re.sub(r'[^\x00-\x7F]+', '', token)
+            token = NON_ASCII_RE.sub('', token)
             
         if not token:
             error_msg = "Token missing; download halted."
             self._log(error_msg, "error")
-            print(f"ERROR: {error_msg}")
             self.signals.download_complete.emit(False)
             return
 
         directory = self.config.get("directory")
-        print(f"DEBUG: Download directory: {directory}")
         if not directory:
             error_msg = "Download directory not set."
             self._log(error_msg, "error")
-            print(f"ERROR: {error_msg}")
             self.signals.download_complete.emit(False)
             return
 
@@ -138,43 +253,42 @@ class SunoDownloader:
 
         target_songs = self.config.get("target_songs", [])
         filters = self.config.get("filter_settings", {})
+        workers = self.config.get("max_workers", MAX_DOWNLOAD_WORKERS)
         
-        headers = {"Authorization": f"Bearer {token}"}
-        existing_uuids = get_downloaded_uuids(directory)
+        self._set_token(token)
+        self._known_dirs = set()
+        with self._wav_lock:
+            self._wav_requests.clear()  # Requests left over from a stopped run
+        with self._detail_lock:
+            self._detail_requests.clear()
+        # One walk of the download folder serves both the per-song skip and the feed duplicate filter.
+        # It runs in the background so that in feed mode it overlaps the first page request.
+        uuid_scan = ThreadPoolExecutor(max_workers=1, thread_name_prefix="suno-scan")
+        existing_future = uuid_scan.submit(build_uuid_cache, directory)
+        uuid_scan.shutdown(wait=False)
 
         # Mode 1: Download Specific Songs (from Preload)
         if target_songs:
+            existing_uuids = existing_future.result()
             self.signals.status_changed.emit(f"Downloading {len(target_songs)} selected songs...")
             self._log(f"Starting download of {len(target_songs)} selected songs...", "info")
             
-            with ThreadPoolExecutor(max_workers=3) as executor:
+            slots = threading.Semaphore(workers * QUEUED_PER_WORKER)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="suno-dl") as executor:
                 futures = []
                 for song_data in target_songs:
-                    if self.is_stopped(): break
-                    futures.append(
-                        executor.submit(
-                            self.download_single_song,
-                            song_data,
-                            directory,
-                            headers,
-                            token,
-                            existing_uuids,
-                            self.rate_limiter,
-                        )
+                    future = self._submit_download(
+                        executor, slots,
+                        song_data,
+                        directory,
+                        existing_uuids,
+                        self.rate_limiter,
                     )
+                    if future is None: break
+                    futures.append(future)
                 
                 # Wait for futures but check stop event
-                for future in futures:
-                    if self.is_stopped():
-                        executor.shutdown(wait=False, cancel_futures=True)
-                        break
-                    try:
-                        future.result()
-                    except Exception as e:
-                        import traceback
-                        error_msg = f"Download error: {str(e)}\n{traceback.format_exc()}"
-                        self._log(error_msg, "error")
-                        print(error_msg)  # Also print for debug log
+                self._wait_for_futures(executor, futures)
             
             if self.is_stopped():
                 self.signals.status_changed.emit("Stopped")
@@ -186,7 +300,6 @@ class SunoDownloader:
         # Mode 2: Scan/Download from Feed/Workspace
         self.signals.status_changed.emit("Scanning...")
         self._log("Scanning existing files...", "info")
-        self._log(f"Found {len(existing_uuids)} existing songs.", "info")
 
         # --- URL Selection Logic ---
         workspace_id = filters.get("workspace_id")
@@ -202,24 +315,24 @@ class SunoDownloader:
             # User correction: Use /api/project/{id} (no /clips, no trailing slash before ?)
             if workspace_id == "default":
                 # Assuming default project ID is "default"
-                base_url = "https://studio-api.prod.suno.com/api/project/default"
+                base_url = f"{GEN_API_BASE}/api/project/default"
             else:
                 # Check if it is a playlist or project
                 if filters.get("type") == "playlist":
                      # Playlists might not support pagination, so we'll try without page parameter first
-                     base_url = f"https://studio-api.prod.suno.com/api/playlist/{workspace_id}/"
+                     base_url = f"{GEN_API_BASE}/api/playlist/{workspace_id}/"
                 else:
-                     base_url = f"https://studio-api.prod.suno.com/api/project/{workspace_id}"
+                     base_url = f"{GEN_API_BASE}/api/project/{workspace_id}"
             
             self._log(f"Fetching from {filters.get('type', 'Project')}: {filters.get('workspace_name', workspace_id)}", "info")
         elif is_public:
             # Public Feed (v2)
-            base_url = "https://studio-api.prod.suno.com/api/feed/v2"
+            base_url = f"{GEN_API_BASE}/api/feed/v2"
             params.append("is_public=true")
             self._log("Fetching from Public Feed", "info")
         else:
             # My Library (v1) - Default
-            base_url = "https://studio-api.prod.suno.com/api/feed/"
+            base_url = f"{GEN_API_BASE}/api/feed/"
             self._log("Fetching from My Library", "info")
             
         # Append params to base_url
@@ -244,12 +357,35 @@ class SunoDownloader:
         try:
             self.signals.status_changed.emit("Fetching List...")
             self._log("Fetching song list...", "info")
+
+            # Fetches feed pages in the background; the first one is requested before waiting for the folder walk
+            page_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="suno-page")
+            next_page = None
+            if not (max_pages > 0 and page_num > max_pages):
+                next_page = page_executor.submit(self._fetch_page, base_url, page_num, is_playlist)
+            existing_uuids = existing_future.result()
+            self._log(f"Found {len(existing_uuids)} existing songs.", "info")
             
-            # Build UUID cache from existing files for duplicate detection
-            self._log("Building UUID cache from existing files...", "info")
-            from suno_utils import build_uuid_cache
-            uuid_cache = build_uuid_cache(directory)
-            self._log(f"Found {len(uuid_cache)} existing songs in cache.", "info")
+            # Snapshot of the existing files for duplicate detection (existing_uuids keeps growing)
+            uuid_cache = frozenset(existing_uuids)
+            
+            # Filter flags from the UI, read once for the whole run
+            filter_liked_only = filters.get("liked", False)
+            filter_hide_stems = filters.get("hide_gen_stems", False)
+            filter_exclude_trash = not filters.get("trashed", False)
+            filter_hide_disliked = filters.get("hide_disliked", False)
+            filter_public_only = filters.get("is_public", False)
+            filter_hide_studio = filters.get("hide_studio_clips", False)
+            filter_type = filters.get("type", "all")
+            search_text = filters.get("search_text", "").strip().lower()
+            stems_only = self.config.get("stems_only")
+
+            # Override: If Stems Only is active, disable Hide Stems
+            if stems_only:
+                filter_hide_stems = False
+            # Per-clip lookups that only some filters need are skipped when those filters are off
+            check_stems = filter_hide_stems or stems_only
+            check_clip_type = filter_hide_studio or filter_type == "uploads"
             
             consecutive_skipped_pages = 0
             # Adaptive threshold: scale with library size
@@ -258,14 +394,7 @@ class SunoDownloader:
             # For large libraries (1000-5000 songs): 10 pages
             # For very large libraries (> 5000 songs): 20 pages
             library_size = len(uuid_cache)
-            if library_size < 100:
-                smart_resume_threshold = 2
-            elif library_size < 1000:
-                smart_resume_threshold = 5
-            elif library_size < 5000:
-                smart_resume_threshold = 10
-            else:
-                smart_resume_threshold = 20
+            smart_resume_threshold = RESUME_THRESHOLDS[bisect.bisect_right(RESUME_LIBRARY_SIZES, library_size)]
             
             # Track if we've found ANY new songs yet (to avoid stopping on initial already-downloaded pages)
             found_new_songs = False
@@ -273,90 +402,29 @@ class SunoDownloader:
             if self.config.get("smart_resume"):
                 self._log(f"Smart Resume: Will stop after {smart_resume_threshold} consecutive pages with no new songs (library size: {library_size} songs).", "info")
             
-            with ThreadPoolExecutor(max_workers=3) as executor:
+            # Download futures per page; the scan may run PAGES_AHEAD pages ahead of the downloads
+            pending_pages = deque()
+            slots = threading.Semaphore(workers * QUEUED_PER_WORKER)
+            list_key = None  # Where the previous page kept its clips
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="suno-dl") as executor:
                 while not self.is_stopped():
                     if max_pages > 0 and page_num > max_pages:
                         self._log(f"Reached max pages limit ({max_pages}). Stopping.", "info")
                         break
 
                     self._log(f"Page {page_num}...", "info")
-                    # Retry logic for fetching page
-                    max_retries = 3
-                    for attempt in range(max_retries):
-                        try:
-                            # For playlists, don't append page number
-                            if is_playlist:
-                                url = base_url
-                            else:
-                                url = f"{base_url}{page_num}"
-                            # Increased timeout to 30s and added retry loop
-                            r = requests.get(url, headers=headers, timeout=30)
-                            
-                            # 404 Fallback Logic: Project -> Playlist
-                            if r.status_code == 404:
-                                if "/api/project/" in base_url:
-                                    self._log("Project endpoint 404. Switching to Playlist endpoint...", "warning")
-                                    # Regex replace /api/project/ID -> /api/playlist/ID/
-                                    base_url = re.sub(r"/api/project/([^?&]+)", r"/api/playlist/\1/", base_url)
-                                    continue # Retry immediately with new URL
-                                else:
-                                    self._log("Error: Resource not found (404).", "error")
-                                    success = False
-                                    break
-
-                            if r.status_code == 401:
-                                self._log("Error: Token expired.", "error")
-                                self.signals.error_occurred.emit("Token expired. Please get a new token.")
-                                success = False
-                                break # Break retry loop, outer loop will also break due to success=False
-                            r.raise_for_status()
-                            data = r.json()
-                            
-                            # Debug: Log response structure for playlists
-                            if is_playlist:
-                                print(f"\n=== PLAYLIST API DEBUG ===")
-                                print(f"URL: {url}")
-                                print(f"Response Status: {r.status_code}")
-                                print(f"Response Type: {type(data)}")
-                                if isinstance(data, dict):
-                                    print(f"Response Keys: {list(data.keys())}")
-                                    # Check for various possible keys
-                                    for key in ["playlist_clips", "clips", "items", "songs", "tracks", "playlist"]:
-                                        if key in data:
-                                            items = data[key]
-                                            if isinstance(items, list):
-                                                print(f"Found '{key}' with {len(items)} items")
-                                                if len(items) > 0:
-                                                    print(f"First item keys: {list(items[0].keys()) if isinstance(items[0], dict) else 'Not a dict'}")
-                                            elif isinstance(items, dict):
-                                                print(f"Found '{key}' as dict with keys: {list(items.keys())}")
-                                elif isinstance(data, list):
-                                    print(f"Response is a list with {len(data)} items")
-                                    if len(data) > 0:
-                                        print(f"First item type: {type(data[0])}")
-                                        if isinstance(data[0], dict):
-                                            print(f"First item keys: {list(data[0].keys())}")
-                                print(f"Full Response (first 1000 chars): {str(data)[:1000]}")
-                                print(f"=== END PLAYLIST DEBUG ===\n")
-                                
-                                self._log(f"Playlist API Response Keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}", "info")
-                            
-                            # If successful, break the retry loop
-                            break 
-                        except Exception as exc:
-                            if attempt < max_retries - 1:
-                                self._log(f"Connection error on page {page_num} (Attempt {attempt+1}/{max_retries}): {exc}. Retrying...", "warning")
-                                time.sleep(2)
-                                continue
-                            else:
-                                self._log(f"Request failed after {max_retries} attempts: {exc}", "error")
-                                self.signals.error_occurred.emit(f"Network error on page {page_num}: {exc}")
-                                success = False
-                                break # Break retry loop
-                    
-                    if not success:
+                    if next_page is None:
+                        next_page = page_executor.submit(self._fetch_page, base_url, page_num, is_playlist)
+                    data, base_url = next_page.result()
+                    next_page = None
+                    if data is None:
+                        success = False
                         break # Break page loop
 
+                    # Request the next page now, so its round trip overlaps with parsing and queueing this one
+                    if not is_playlist and not (max_pages > 0 and page_num >= max_pages) and not self.is_stopped():
+                        next_page = page_executor.submit(self._fetch_page, base_url, page_num + 1, is_playlist)
+
                     # Handle different API response structures and robustly unwrap clips
                     # 1. Project/Workspace: {"project_clips": [{"clip": {...}}, ...]}
                     # 2. Main Library: [{"id": ...}, ...] or {"clips": [...]}
@@ -364,170 +432,109 @@ class SunoDownloader:
                     # --- WORKSPACE PARSING LOGIC ---
                     
                     # 1. Identify the list source
-                    raw_data = data
-                    raw_items = []
-                    
-                    if isinstance(raw_data, dict):
-                        # Try various possible keys for playlist/workspace data
-                        if "project_clips" in raw_data:
-                            raw_items = raw_data["project_clips"]
-                        elif "playlist_clips" in raw_data:
-                            raw_items = raw_data["playlist_clips"]
-                        elif "clips" in raw_data:
-                            raw_items = raw_data["clips"]
-                        elif "items" in raw_data:
-                            raw_items = raw_data["items"]
-                        elif "songs" in raw_data:
-                            raw_items = raw_data["songs"]
-                        elif "tracks" in raw_data:
-                            raw_items = raw_data["tracks"]
-                        elif "playlist" in raw_data and isinstance(raw_data["playlist"], dict):
-                            # Nested playlist structure
-                            playlist_data = raw_data["playlist"]
-                            if "playlist_clips" in playlist_data:
-                                raw_items = playlist_data["playlist_clips"]
-                            elif "clips" in playlist_data:
-                                raw_items = playlist_data["clips"]
-                            elif "items" in playlist_data:
-                                raw_items = playlist_data["items"]
-                    elif isinstance(raw_data, list):
-                        # Direct list of items
-                        raw_items = raw_data
+                    raw_items, list_key = self._find_clip_list(data, list_key)
                     
                     if is_playlist:
-                        print(f"Parsed {len(raw_items)} items from playlist response")
                         self._log(f"Parsed {len(raw_items)} items from playlist response", "info")
                         if len(raw_items) == 0:
-                            print(f"\n!!! WARNING: No items found in playlist response !!!")
-                            print(f"Response type: {type(data)}")
-                            if isinstance(data, dict):
-                                print(f"Response keys: {list(data.keys())}")
-                                # Print full response structure
-                                import json as json_module
-                                try:
-                                    response_str = json_module.dumps(data, indent=2)
-                                    print(f"Full Response:\n{response_str}")
-                                except Exception as e:
-                                    print(f"Could not serialize response: {e}")
-                                    print(f"Response repr: {repr(data)[:1000]}")
-                            print(f"!!! END WARNING !!!\n")
+                            if DEBUG_PLAYLIST:
+                                print(f"\n!!! WARNING: No items found in playlist response !!!")
+                                print(f"Response type: {type(data)}")
+                                if isinstance(data, dict):
+                                    print(f"Response keys: {list(data.keys())}")
+                                    # Print full response structure
+                                    import json as json_module
+                                    try:
+                                        response_str = json_module.dumps(data, indent=2)
+                                        print(f"Full Response:\n{response_str}")
+                                    except Exception as e:
+                                        print(f"Could not serialize response: {e}")
+                                        print(f"Response repr: {repr(data)[:1000]}")
+                                print(f"!!! END WARNING !!!\n")
                             
                             self._log(f"WARNING: No items found in playlist response. Response type: {type(data)}, Keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}", "warning")
+                    elif not raw_items:
+                        self._log(f"Page {page_num} is empty: reached the end of the list.", "info")
+                        break
 
                     filtered_clips = []
+                    skipped_existing = 0
 
-                    # 2. Setup Filter Flags from UI
-                    filter_liked_only = filters.get("liked", False)
-                    filter_hide_stems = filters.get("hide_gen_stems", False)
-                    filter_exclude_trash = not filters.get("trashed", False)
-                    filter_hide_disliked = filters.get("hide_disliked", False)
-                    filter_public_only = filters.get("is_public", False)
-                    filter_hide_studio = filters.get("hide_studio_clips", False)
-                    filter_type = filters.get("type", "all")
-                    search_text = filters.get("search_text", "").strip().lower()
-
-                    # Override: If Stems Only is active, disable Hide Stems
-                    if self.config.get("stems_only"):
-                        filter_hide_stems = False
-
-                    for index, item in enumerate(raw_items):
-                        # A. UNWRAP STRATEGY
-                        if isinstance(item, dict) and "clip" in item:
-                            song_data = item["clip"]
-                        else:
-                            song_data = item
+                    # A. UNWRAP STRATEGY: project/playlist entries wrap the clip as {"clip": {...}}; empty entries are dropped
+                    songs = (item["clip"] if isinstance(item, dict) and "clip" in item else item for item in raw_items)
 
-                        if not song_data:
+                    for song_data in filter(None, songs):
+                        uuid = song_data.get("id")
+
+                        # B. APPLY FILTERS (cheapest and most selective first)
+
+                        # 1. Duplicate Check (Metadata-Based)
+                        if uuid and uuid in uuid_cache:
+                            skipped_existing += 1  # Reported once per page below
                             continue
 
-                        # B. EXTRACT VARIABLES
                         title = song_data.get("title", "") or "Unknown Title"
-                        
-                        # Robust Liked Check
-                        is_liked_bool = song_data.get("is_liked", False)
-                        reaction = song_data.get("reaction", {}) 
-                        if reaction is None: reaction = {} 
-                        reaction_type = reaction.get("reaction_type", "")
-                        vote = song_data.get("vote", "") or song_data.get("metadata", {}).get("vote", "")
-                        
-                        # It is liked if Boolean is True OR Reaction is 'L' OR Vote is 'up'
-                        is_liked = is_liked_bool or (reaction_type == "L") or (vote == "up")
-
-                        # Extract metadata for filters
-                        metadata = song_data.get("metadata", {}) or {}
-                        if metadata is None: metadata = {}
-                        clip_type = metadata.get("type", "")
-
-                        is_stem = self._is_stem(song_data)
-
-                        # Trash Check
-                        is_trashed = song_data.get("is_trashed", False)
-                        
-                        # Public Check
-                        is_public = song_data.get("is_public", False)
-                        
-                        # Audio URL
-                        audio_url = song_data.get("audio_url")
-
-                        # D. APPLY FILTERS
-                        
-                        # 0. Audio URL (Critical)
-                        if not audio_url and not scan_only:
-                            continue
 
-                        # 1. Trash Filter
-                        if filter_exclude_trash and is_trashed:
+                        # 2. Audio URL (Critical)
+                        if not song_data.get("audio_url") and not scan_only:
                             continue
 
-                        # 2. Stem Filter
-                        if filter_hide_stems and is_stem:
+                        # 3. Trash Filter
+                        if filter_exclude_trash and song_data.get("is_trashed", False):
                             continue
 
-                        # 2b. Stems Only Filter
-                        if self.config.get("stems_only") and not is_stem:
+                        # 4. Public Only
+                        if filter_public_only and not song_data.get("is_public", False):
                             continue
 
-                        # 3. Liked Filter
-                        if filter_liked_only:
-                            if not is_liked:
+                        metadata = song_data.get("metadata", {}) or {}
+
+                        if check_clip_type:
+                            clip_type = metadata.get("type", "")
+
+                            # 5. Hide Studio
+                            if filter_hide_studio and clip_type == "studio_clip":
                                 continue
-                        
-                        # 4. Hide Disliked
-                        if filter_hide_disliked and (vote == "down" or reaction_type == "D"):
-                            continue
 
-                        # 5. Public Only
-                        if filter_public_only and not is_public:
-                            continue
-                            
-                        # 6. Hide Studio
-                        if filter_hide_studio and clip_type == "studio_clip":
-                            continue
-                            
-                        # 7. Type Filter
-                        if filter_type == "uploads" and clip_type != "upload":
-                            continue
-                            
-                        # 8. Search Text
-                        if search_text:
-                            tags = metadata.get("tags", "") or ""
-                            prompt = metadata.get("prompt", "") or ""
-                            searchable_content = f"{title_lower} {tags.lower()} {prompt.lower()}"
-                            if search_text not in searchable_content:
+                            # 6. Type Filter
+                            if filter_type == "uploads" and clip_type != "upload":
                                 continue
 
-                        # Extract UUID
-                        uuid = song_data.get("id")
+                        # 7. Liked / Disliked
+                        if filter_liked_only or filter_hide_disliked:
+                            reaction = song_data.get("reaction", {}) or {}
+                            reaction_type = reaction.get("reaction_type", "")
+                            vote = song_data.get("vote", "") or metadata.get("vote", "")
+                            if filter_liked_only:
+                                # It is liked if Boolean is True OR Reaction is 'L' OR Vote is 'up'
+                                is_liked = song_data.get("is_liked", False) or (reaction_type == "L") or (vote == "up")
+                                if not is_liked:
+                                    continue
+                            if filter_hide_disliked and (vote == "down" or reaction_type == "D"):
+                                continue
 
-                        # 9. Duplicate Check (Metadata-Based)
-                        if uuid and uuid in uuid_cache:
-                            self._log(f"Skipping {title} (UUID found in cache)", "info")
-                            continue
+                        # 8. Stem Filters (Hide Stems / Stems Only)
+                        if check_stems:
+                            is_stem = self._is_stem(song_data)
+                            if filter_hide_stems and is_stem:
+                                continue
+                            if stems_only and not is_stem:
+                                continue
+
+                        # 9. Search Text
+                        # Most hits are in the title; only then build the (long) title+tags+prompt text
+                        if search_text and search_text not in title.lower():
+                            tags = metadata.get("tags", "") or ""
+                            prompt = metadata.get("prompt", "") or ""
+                            if search_text not in f"{title} {tags} {prompt}".lower():
+                                continue
 
-                        # E. SUCCESS
+                        # C. SUCCESS
                         filtered_clips.append(song_data)
 
 
+                    if skipped_existing:
+                        self._log(f"Page {page_num}: skipped {skipped_existing} already-downloaded songs.", "info")
                     if not filtered_clips:
                         self._log(f"Page {page_num}: All songs filtered out or skipped.", "info")
                     
@@ -555,29 +562,27 @@ class SunoDownloader:
                             if self.is_stopped(): break
                             self.signals.song_found.emit(clip)
                     else:
+                        # Start every missing-prompt refetch of the page now rather than one per download slot
+                        for clip in filtered_clips:
+                            if clip.get("id") not in existing_uuids:
+                                self._request_clip_details(clip)
                         futures = []
                         for clip in filtered_clips:
-                            if self.is_stopped(): break
-                            futures.append(
-                                executor.submit(
-                                    self.download_single_song,
-                                    clip,
-                                    directory,
-                                    headers,
-                                    token,
-                                    existing_uuids,
-                                    self.rate_limiter,
-                                )
+                            future = self._submit_download(
+                                executor, slots,
+                                clip,
+                                directory,
+                                existing_uuids,
+                                self.rate_limiter,
                             )
+                            if future is None: break
+                            futures.append(future)
+                        pending_pages.append(futures)
 
-                        for future in futures:
-                            if self.is_stopped():
-                                executor.shutdown(wait=False, cancel_futures=True)
+                        # Keep fetching while this page downloads, but don't let the scan run too far ahead
+                        while len(pending_pages) > PAGES_AHEAD:
+                            if not self._wait_for_futures(executor, pending_pages.popleft()):
                                 break
-                            try:
-                                future.result()
-                            except Exception:
-                                pass
 
                     # For playlists, only fetch once (no pagination)
                     if is_playlist:
@@ -588,7 +593,14 @@ class SunoDownloader:
                         break
                     
                     page_num += 1
-                    time.sleep(1)
+
+                # A page prefetched past the end of the scan is simply dropped
+                page_executor.shutdown(wait=False, cancel_futures=True)
+
+                # Let the downloads of the last pages finish
+                while pending_pages:
+                    if not self._wait_for_futures(executor, pending_pages.popleft()):
+                        break
         except Exception as exc:
             tb = traceback.format_exc()
             self._log(f"Critical Error: {exc}\n{tb}", "error")
@@ -604,9 +616,152 @@ class SunoDownloader:
             
         self.signals.download_complete.emit(success)
 
+    def _fetch_page(self, base_url, page_num, is_playlist):
+        """
+        Fetch and parse one feed page, retrying connection errors and rate limits.
+        Returns (data, base_url): data is None on failure, and base_url changes if a project turned out to be a playlist.
+        """
+        max_retries = 3
+        for attempt in range(max_retries):
+            if self.is_stopped():
+                return None, base_url
+            try:
+                # For playlists, don't append page number
+                url = base_url if is_playlist else f"{base_url}{page_num}"
+                if not self.page_limiter.wait(self.stop_event):
+                    return None, base_url
+                # Increased timeout to 30s and added retry loop
+                r = self.session.get(url, timeout=30)
+
+                if r.status_code == 429:
+                    retry_after = self._parse_retry_after(r.headers.get("Retry-After"))
+                    self.page_limiter.backoff(retry_after)
+                    self._log(f"Rate limited on page {page_num}; slowing down to one page every {self.page_limiter.min_interval:.1f}s.", "warning")
+                    if attempt < max_retries - 1:
+                        continue
+
+                # 404 Fallback Logic: Project -> Playlist
+                if r.status_code == 404:
+                    if "/api/project/" in base_url:
+                        self._log("Project endpoint 404. Switching to Playlist endpoint...", "warning")
+                        # Regex replace /api/project/ID -> /api/playlist/ID/
+                        base_url = PROJECT_TO_PLAYLIST_RE.sub(r"/api/playlist/\1/", base_url)
+                        continue # Retry immediately with new URL
+                    else:
+                        self._log("Error: Resource not found (404).", "error")
+                        return None, base_url
+
+                if r.status_code == 401:
+                    self._log("Error: Token expired.", "error")
+                    self.signals.error_occurred.emit("Token expired. Please get a new token.")
+                    return None, base_url
+                r.raise_for_status()
+                self.page_limiter.relax()
+                data = parse_json(r.content)
+
+                # Debug: Log response structure for playlists
+                if is_playlist:
+                    if DEBUG_PLAYLIST:
+                        print(f"\n=== PLAYLIST API DEBUG ===")
+                        print(f"URL: {url}")
+                        print(f"Response Status: {r.status_code}")
+                        print(f"Response Type: {type(data)}")
+                        if isinstance(data, dict):
+                            print(f"Response Keys: {list(data.keys())}")
+                            # Check for various possible keys
+                            for key in ["playlist_clips", "clips", "items", "songs", "tracks", "playlist"]:
+                                if key in data:
+                                    items = data[key]
+                                    if isinstance(items, list):
+                                        print(f"Found '{key}' with {len(items)} items")
+                                        if len(items) > 0:
+                                            print(f"First item keys: {list(items[0].keys()) if isinstance(items[0], dict) else 'Not a dict'}")
+                                    elif isinstance(items, dict):
+                                        print(f"Found '{key}' as dict with keys: {list(items.keys())}")
+                        elif isinstance(data, list):
+                            print(f"Response is a list with {len(data)} items")
+                            if len(data) > 0:
+                                print(f"First item type: {type(data[0])}")
+                                if isinstance(data[0], dict):
+                                    print(f"First item keys: {list(data[0].keys())}")
+                        print(f"Full Response (first 1000 chars): {str(data)[:1000]}")
+                        print(f"=== END PLAYLIST DEBUG ===\n")
+
+                    self._log(f"Playlist API Response Keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}", "info")
+
+                return data, base_url
+            except Exception as exc:
+                if attempt < max_retries - 1:
+                    self._log(f"Connection error on page {page_num} (Attempt {attempt+1}/{max_retries}): {exc}. Retrying...", "warning")
+                    time.sleep(2)
+                    continue
+                else:
+                    self._log(f"Request failed after {max_retries} attempts: {exc}", "error")
+                    self.signals.error_occurred.emit(f"Network error on page {page_num}: {exc}")
+                    return None, base_url
+        return None, base_url
+
+    def _find_clip_list(self, data, hint=None):
+        """
+        Return (items, hint) for a feed, project or playlist response.
+        hint is the (nested, key) pair that matched; pass it back to check that key first on the next page.
+        """
+        if isinstance(data, list):
+            return data, hint  # Direct list of items
+        if not isinstance(data, dict):
+            return [], hint
+        if hint:
+            nested, key = hint
+            source = data.get("playlist") if nested else data
+            if isinstance(source, dict) and key in source:
+                return source[key], hint
+        for key in self._LIST_KEYS:
+            if key in data:
+                return data[key], (False, key)
+        playlist_data = data.get("playlist")
+        if isinstance(playlist_data, dict):
+            for key in self._NESTED_LIST_KEYS:
+                if key in playlist_data:
+                    return playlist_data[key], (True, key)
+        return [], hint
+
+    def _submit_download(self, executor, slots, clip, directory, existing_uuids, rate_limiter):
+        """
+        Submit download_single_song once one of the bounded slots is free.
+        Returns the future, or None if stopped while waiting.
+        """
+        if clip.get("id") not in existing_uuids:
+            self._request_wav_conversion(clip)
+        while not slots.acquire(timeout=0.5):
+            if self.is_stopped():
+                return None
+        if self.is_stopped():
+            slots.release()
+            return None
+        future = executor.submit(self.download_single_song, clip, directory, existing_uuids, rate_limiter)
+        future.add_done_callback(lambda f: slots.release())
+        return future
+
+    def _wait_for_futures(self, executor, futures):
+        """Wait for download futures as they complete; on stop, cancel those not yet started and return False."""
+        pending = set(futures)
+        while pending:
+            if self.is_stopped():
+                executor.shutdown(wait=False, cancel_futures=True)
+                return False
+            # Short timeout so a stalled download can't delay the stop check
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    future.result()
+                except Exception as e:
+                    error_msg = f"Download error: {str(e)}\n{traceback.format_exc()}"
+                    self._log(error_msg, "error")
+        return True
+
     def fetch_workspaces(self, token):
         """Fetch list of workspaces (projects) using the correct endpoint with pagination."""
-        headers = {"Authorization": f"Bearer {token}"}
+        self._set_token(token)
         
         # Endpoint provided by user: 
         # https://studio-api.prod.suno.com/api/project/me?page=1&sort=created_at&show_trashed=false
@@ -618,9 +773,9 @@ class SunoDownloader:
             url = f"{GEN_API_BASE}/api/project/me?page={page_num}&sort=created_at&show_trashed=false"
             
             try:
-                r = requests.get(url, headers=headers, timeout=10)
+                r = self.session.get(url, timeout=10)
                 if r.status_code == 200:
-                    data = r.json()
+                    data = parse_json(r.content)
                     # User confirmed structure: {"projects": [...]}
                     projects = data.get("projects", [])
                     
@@ -644,7 +799,7 @@ class SunoDownloader:
 
     def fetch_playlists(self, token):
         """Fetch list of playlists with pagination."""
-        headers = {"Authorization": f"Bearer {token}"}
+        self._set_token(token)
         # Endpoint: /api/playlist/me?page=1&show_trashed=false&show_sharelist=false
         
         all_playlists = []
@@ -654,9 +809,9 @@ class SunoDownloader:
             url = f"{GEN_API_BASE}/api/playlist/me?page={page_num}&show_trashed=false&show_sharelist=false"
             
             try:
-                r = requests.get(url, headers=headers, timeout=10)
+                r = self.session.get(url, timeout=10)
                 if r.status_code == 200:
-                    data = r.json()
+                    data = parse_json(r.content)
                     # Structure: {"playlists": [...]}
                     playlists = data.get("playlists", [])
                     
@@ -678,7 +833,7 @@ class SunoDownloader:
         
         return all_playlists
 
-    def download_single_song(self, clip, directory, headers, token, existing_uuids, rate_limiter):
+    def download_single_song(self, clip, directory, existing_uuids, rate_limiter):
         if self.is_stopped():
             return
 
@@ -689,27 +844,22 @@ class SunoDownloader:
 
         title = clip.get("title") or uuid
         image_url = clip.get("image_url")
+        # Fetch the thumbnail alongside the detail refetch below instead of after it
+        thumb_future = self._thumb_executor.submit(self.fetch_thumbnail_bytes, image_url) if image_url else None
         display_name = clip.get("display_name")
         metadata = clip.get("metadata", {})
         prompt = metadata.get("prompt", "")
         
         # --- REFETCH STRATEGY ---
-        # If prompt is missing (common in V5/Covers list view), fetch full details
-        if not prompt:
-            clip_id = clip.get("id")
-            if clip_id:
-                try:
-                    detail_url = f"https://studio-api.prod.suno.com/api/clip/{clip_id}"
-                    # Use the same headers (auth) as the main request
-                    r_refetch = requests.get(detail_url, headers=headers, timeout=10)
-                    if r_refetch.status_code == 200:
-                        full_details = r_refetch.json()
-                        metadata = full_details.get("metadata", {})
-                        prompt = metadata.get("prompt", "")
-                        # Update clip metadata so subsequent logic uses it
-                        clip["metadata"] = metadata
-                except Exception as e:
-                    self._log(f"Failed to refetch prompt for {clip_id}: {e}", "warning")
+        # If prompt is missing (common in V5/Covers list view), use the full details,
+        # normally already refetched when the page was queued.
+        if self._needs_details(clip):
+            full_metadata = self._get_clip_details(clip.get("id"))
+            if full_metadata is not None:
+                metadata = full_metadata
+                prompt = metadata.get("prompt", "")
+                # Update clip metadata so subsequent logic uses it
+                clip["metadata"] = metadata
         # ------------------------
         tags = metadata.get("tags", "")
         created_at = clip.get("created_at", "")
@@ -720,12 +870,17 @@ class SunoDownloader:
         else:
             self._log(f"No lyrics found for {title} in metadata", "warning")
         
-        thumb_data = self.fetch_thumbnail_bytes(image_url) if image_url else None
+        thumb_data = None
+        if thumb_future:
+            try:
+                thumb_data = thumb_future.result(timeout=5)
+            except Exception:
+                thumb_future.cancel()  # Too slow: start the song without a thumbnail
         
         # Notify start
         self.signals.song_started.emit(uuid, title, thumb_data, metadata)
 
-        audio_url, file_ext, used_wav = self._resolve_audio_stream(clip, title, headers)
+        audio_url, file_ext, used_wav = self._resolve_audio_stream(clip, title)
         if not audio_url:
             self._log(f"No usable audio stream for {title}; skipping.", "error")
             self.signals.song_updated.emit(uuid, "Error", 0)
@@ -736,21 +891,21 @@ class SunoDownloader:
             try:
                 month_folder = created_at[:7]
                 target_dir = os.path.join(directory, month_folder)
-                if not os.path.exists(target_dir):
-                    os.makedirs(target_dir)
-            except:
-                pass
+                self._ensure_dir(target_dir)
+            except OSError as e:
+                self._log(f"Could not create folder {target_dir}: {e}", "warning")
+                target_dir = directory
 
         if self.config.get("organize_by_track") and self._is_stem(clip):
             try:
                 # Create a subfolder with the song title (stripped of stem indicators)
                 base_title = self._get_base_title(title)
                 safe_title = sanitize_filename(base_title)
-                target_dir = os.path.join(target_dir, safe_title)
-                if not os.path.exists(target_dir):
-                    os.makedirs(target_dir)
-            except:
-                pass
+                track_dir = os.path.join(target_dir, safe_title)
+                self._ensure_dir(track_dir)
+                target_dir = track_dir
+            except OSError as e:
+                self._log(f"Could not create folder for {title}: {e}", "warning")
 
         ext = file_ext or ".mp3"
         fname = sanitize_filename(title) + ext
@@ -761,37 +916,63 @@ class SunoDownloader:
         self._log(f"Downloading: {title}", "downloading", thumbnail_data=thumb_data)
         self.signals.song_updated.emit(uuid, "Downloading", 0)
 
+        # Stream into a .part file and rename it when complete: an interrupted download never
+        # carries the final name, so neither the library nor the UUID scan picks it up
+        part_path = out_path + ".part"
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                if rate_limiter:
-                    rate_limiter.wait()
-                with requests.get(audio_url, stream=True, headers=headers, timeout=60) as r_dl:
+                if rate_limiter and not rate_limiter.wait(self.stop_event):
+                    self._remove_partial(part_path)  # Left by an earlier attempt, if any
+                    self._drop_progress(uuid)
+                    return
+                # Separate connect/read timeouts: an unreachable CDN fails in seconds, a slow stream gets a minute
+                with self.session.get(audio_url, stream=True, headers=IDENTITY_ENCODING, timeout=(10, 60)) as r_dl:
                     r_dl.raise_for_status()
                     total_size = int(r_dl.headers.get('content-length', 0))
                     downloaded = 0
+                    last_percent = 0
                     
-                    with open(out_path, "wb") as f:
-                        for chunk in r_dl.iter_content(chunk_size=8192):
-                            if self.is_stopped():
-                                f.close()
-                                os.remove(out_path)
-                                return
-                            f.write(chunk)
-                            downloaded += len(chunk)
-                            if total_size > 0:
-                                percent = int(downloaded * 100 / total_size)
-                                self.signals.song_updated.emit(uuid, "Downloading", percent)
+                    with open(part_path, "wb", buffering=DOWNLOAD_BUFFER_SIZE) as f:
+                        if total_size <= 0:
+                            # No size means no progress to report: let shutil copy socket -> file in C
+                            r_dl.raw.decode_content = True
+                            shutil.copyfileobj(r_dl.raw, f, DOWNLOAD_BUFFER_SIZE)
+                        else:
+                            self._preallocate(f, total_size)
+                            for chunk in r_dl.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                                if self.is_stopped():
+                                    break
+                                f.write(chunk)
+                                downloaded += len(chunk)
+                                percent = downloaded * 100 // total_size
+                                # Report in 5% steps rather than on every chunk
+                                if percent - last_percent >= 5:
+                                    last_percent = percent
+                                    self._progress[uuid] = percent  # Sent by _progress_pump
+                            if downloaded < total_size:
+                                f.truncate(downloaded)  # Don't leave reserved zero bytes at the end
+                if self.is_stopped():
+                    self._remove_partial(part_path)
+                    self._drop_progress(uuid)
+                    return
+                os.replace(part_path, out_path)
                 break
             except Exception as exc:
                 if attempt < max_retries - 1:
                     self._log(f"  Retry {attempt+1}/{max_retries}...", "info")
-                    time.sleep(2)
+                    if self.stop_event.wait(2):
+                        self._remove_partial(part_path)
+                        self._drop_progress(uuid)
+                        return
                 else:
                     self._log(f"Failed: {title} - {exc}", "error")
+                    self._remove_partial(part_path)
+                    self._drop_progress(uuid)
                     self.signals.song_updated.emit(uuid, "Error", 0)
                     return
 
+        self._drop_progress(uuid)
         try:
             if lyrics and self.config.get("save_lyrics", True):
                 txt_path = os.path.splitext(out_path)[0] + ".txt"
@@ -811,7 +992,7 @@ class SunoDownloader:
                     comment=prompt,
                     lyrics=lyrics,
                     uuid=uuid,
-                    token=token,
+                    session=self.session,  # Already carries the auth header
                 )
             elif lyrics:
                 # Only embed lyrics even if full metadata is disabled
@@ -831,30 +1012,73 @@ class SunoDownloader:
             self._log(f"  Metadata error: {exc}", "error")
             self.signals.song_finished.emit(uuid, True, out_path) # Still success even if metadata fails
 
+    @staticmethod
+    def _preallocate(f, size):
+        """Reserve the full file size up front so the filesystem can allocate it in one go."""
+        try:
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(f.fileno(), 0, size)
+            else:
+                f.truncate(size)
+        except OSError:
+            pass  # Not supported by this filesystem; the file just grows as it is written
+
+    @staticmethod
+    def _remove_partial(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _set_token(self, token):
+        """Authorize every request made through the shared session."""
+        # Header values must be ASCII; workspace/playlist lookups pass the raw token straight in
+        self.session.headers["Authorization"] = f"Bearer {NON_ASCII_RE.sub('', token.strip())}"
+
+    def _ensure_dir(self, path):
+        """Create a download subfolder, at most once per run."""
+        if path not in self._known_dirs:
+            os.makedirs(path, exist_ok=True)
+            self._known_dirs.add(path)
+
     def _is_stem(self, song_data):
-        """Check if song is a stem."""
+        """Check if song is a stem. The answer is cached on the clip dict."""
+        cached = song_data.get("_is_stem")
+        if cached is not None:
+            return cached
+        
         metadata = song_data.get("metadata", {}) or {}
-        if metadata is None: metadata = {}
         clip_type = metadata.get("type", "")
-        top_type = song_data.get("type", "")
+        top_type = song_data.get("type", "") or ""
         title = song_data.get("title", "") or ""
         
-        title_lower = title.lower()
-        is_stem_title = any(ind in title_lower for ind in self.STEM_INDICATORS)
-        
-        return (clip_type in ["gen_stem", "stem"] or 
-                "stem" in top_type or 
-                is_stem_title)
+        # Cheap type checks first; the title is scanned once for all indicators
+        is_stem = (clip_type in ("gen_stem", "stem") or
+                   "stem" in top_type or
+                   self._has_stem_indicator(title))
+        song_data["_is_stem"] = is_stem
+        return is_stem
+
+    @classmethod
+    def _has_stem_indicator(cls, title):
+        """True if the title contains any stem indicator (Aho-Corasick if available, else the regex)."""
+        if not AHOCORASICK_AVAILABLE:
+            return cls._STEM_RE.search(title) is not None
+        if cls._stem_automaton is None:
+            automaton = ahocorasick.Automaton()
+            for ind in cls.STEM_INDICATORS:
+                automaton.add_word(ind.lower(), True)
+            automaton.make_automaton()
+            cls._stem_automaton = automaton
+        for _ in cls._stem_automaton.iter(title.lower()):
+            return True
+        return False
 
     def _get_base_title(self, title):
         """Strip stem indicators from title to get base song name."""
-        clean_title = title
-        for ind in self.STEM_INDICATORS:
-            pattern = re.escape(ind)
-            clean_title = re.sub(pattern, "", clean_title, flags=re.IGNORECASE)
-        return clean_title.strip()
+        return self._STEM_RE.sub("", title).strip()
 
-    def _resolve_audio_stream(self, clip, title, headers):
+    def _resolve_audio_stream(self, clip, title):
         prefer_wav = self.config.get("prefer_wav")
         audio_url = clip.get("audio_url")
         extension = ".mp3"
@@ -866,7 +1090,7 @@ class SunoDownloader:
             used_wav = True
         elif prefer_wav:
             # self._log(f"WAV stream unavailable for '{title}'. Requesting conversion...", "info")
-            converted = self._fetch_converted_wav(clip, headers)
+            converted = self._fetch_converted_wav(clip)
             if converted:
                 audio_url = converted
                 extension = self._extract_extension_from_url(converted, default=".wav")
@@ -883,97 +1107,333 @@ class SunoDownloader:
         return audio_url, extension, used_wav
 
     def _find_wav_url(self, data):
-        if isinstance(data, str):
-            val = data.strip()
-            lowered = val.lower()
-            if lowered.startswith("http") and ".wav" in lowered:
-                return val
-            return None
-
-        if isinstance(data, dict):
-            prioritized = (
-                "audio_url_wav",
-                "wav_url",
-                "wav_audio_url",
-                "master_wav_url",
-                "preview_wav_url",
-            )
-            for key in prioritized:
-                val = data.get(key)
-                if isinstance(val, str) and val.lower().startswith("http") and ".wav" in val.lower():
+        """Depth-first search of a clip/API payload for the first WAV URL."""
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                val = node.strip()
+                if WAV_URL_RE.match(val):
                     return val
-            for value in data.values():
-                candidate = self._find_wav_url(value)
-                if candidate:
-                    return candidate
+            elif isinstance(node, dict):
+                for key in WAV_URL_KEYS:
+                    val = node.get(key)
+                    if isinstance(val, str) and WAV_URL_RE.match(val):
+                        return val
+                # Reversed so values are visited in the same order as a recursive walk
+                stack.extend(v for v in reversed(list(node.values())) if isinstance(v, (str, dict, list)))
+            elif isinstance(node, list):
+                stack.extend(v for v in reversed(node) if isinstance(v, (str, dict, list)))
+        return None
 
-        if isinstance(data, list):
-            for entry in data:
-                candidate = self._find_wav_url(entry)
-                if candidate:
-                    return candidate
+    def _needs_details(self, clip):
+        """True if the clip was listed without a prompt that this download will use."""
+        metadata = clip.get("metadata") or {}
+        if not clip.get("id") or metadata.get("prompt"):
+            return False
+        # Without full metadata embedding the prompt only matters as a lyrics fallback
+        has_lyrics = metadata.get("lyrics") or metadata.get("text")
+        return bool(self.config.get("embed_metadata") or not has_lyrics)
+
+    def _request_clip_details(self, clip):
+        """Start refetching the clip's full details in the background if its download will need them."""
+        if not self._needs_details(clip):
+            return
+        clip_id = clip["id"]
+        with self._detail_lock:
+            if clip_id not in self._detail_requests:
+                self._detail_requests[clip_id] = self._detail_executor.submit(self._fetch_clip_details, clip_id)
+
+    def _fetch_clip_details(self, clip_id):
+        """Return the clip's full metadata dict, or None if the refetch failed."""
+        try:
+            detail_url = f"{GEN_API_BASE}/api/clip/{clip_id}"
+            # The session carries the same auth header as the main request
+            r_refetch = self.session.get(detail_url, timeout=10)
+            if r_refetch.status_code == 200:
+                return parse_json(r_refetch.content).get("metadata", {})
+        except Exception as e:
+            self._log(f"Failed to refetch prompt for {clip_id}: {e}", "warning")
         return None
 
-    def _fetch_converted_wav(self, clip, headers):
+    def _get_clip_details(self, clip_id):
+        with self._detail_lock:
+            request = self._detail_requests.pop(clip_id, None)
+        # Normally already requested at queue time; fall back to fetching it now
+        if request is None or request.cancelled():
+            return self._fetch_clip_details(clip_id)
+        return request.result()
+
+    def _request_wav_conversion(self, clip):
+        """Start a WAV conversion in the background if this clip will need one."""
         clip_id = clip.get("id")
-        if not clip_id:
-            return None
+        if not clip_id or not self.config.get("prefer_wav") or clip_id in self._wav_url_cache or self._find_wav_url(clip):
+            return
+        with self._wav_lock:
+            if clip_id not in self._wav_requests:
+                self._wav_requests[clip_id] = self._wav_executor.submit(self._post_wav_conversion, clip_id)
+
+    def _post_wav_conversion(self, clip_id):
         convert_url = f"{GEN_API_BASE}/api/gen/{clip_id}/convert_wav/"
         # self._log(f"Requesting WAV conversion for '{clip_id}'...", "info")
         try:
-            resp = requests.post(convert_url, headers=headers, timeout=15)
+            resp = self.session.post(convert_url, timeout=15)
             resp.raise_for_status()
         except Exception as exc:
             self._log(f"Failed to request WAV conversion: {exc}", "error")
             return None
-        return self._wait_for_wav_url(clip_id, headers)
+        return time.monotonic()
 
-    def _wait_for_wav_url(self, clip_id, headers, timeout=120, interval=2):
+    def _fetch_converted_wav(self, clip):
+        clip_id = clip.get("id")
+        if not clip_id:
+            return None
+        cached = self._wav_url_cache.get(clip_id)
+        if cached:
+            return cached
+        with self._wav_lock:
+            request = self._wav_requests.pop(clip_id, None)
+        # Normally already requested at queue time; fall back to requesting it now
+        if request is None or request.cancelled():
+            requested_at = self._post_wav_conversion(clip_id)
+        else:
+            requested_at = request.result()
+        if requested_at is None:
+            return None
+        wav_url = self._wait_for_wav_url(clip_id, requested_at)
+        if wav_url:
+            self._wav_url_cache[clip_id] = wav_url
+            self._schedule_wav_url_save()
+        return wav_url
+
+    def _load_wav_url_cache(self):
+        if not self.wav_cache_file or not os.path.exists(self.wav_cache_file):
+            return {}
+        try:
+            data = load_json(self.wav_cache_file)
+            return data if isinstance(data, dict) else {}
+        except Exception as e:
+            print(f"Error loading WAV URL cache: {e}")
+            return {}
+
+    def _schedule_wav_url_save(self):
+        """Write the WAV URL cache shortly, so a batch of conversions results in a single write."""
+        if not self.wav_cache_file:
+            return
+        with self._wav_save_lock:
+            if self._wav_save_timer is None:
+                self._wav_save_timer = threading.Timer(WAV_SAVE_DELAY, self._save_wav_url_cache)
+                self._wav_save_timer.daemon = True
+                self._wav_save_timer.start()
+
+    def _save_wav_url_cache(self):
+        with self._wav_save_lock:
+            timer, self._wav_save_timer = self._wav_save_timer, None
+            if timer is None:
+                return  # Nothing new since the last write
+            timer.cancel()
+            try:
+                save_json(self.wav_cache_file, dict(self._wav_url_cache))
+            except Exception as e:
+                print(f"Error saving WAV URL cache: {e}")
+
+    def _wait_for_wav_url(self, clip_id, requested_at=None, timeout=120, base_delay=0.5, max_delay=8.0):
+        """Poll until the converted WAV is ready, backing off exponentially with full jitter."""
         deadline = time.monotonic() + timeout
-        detail_url = f"https://studio-api.prod.suno.com/api/gen/{clip_id}/wav_file/"
+        detail_url = f"{GEN_API_BASE}/api/gen/{clip_id}/wav_file/"
+        attempt = 0
+        if requested_at is not None and self._wav_convert_time:
+            # Earlier conversions show roughly how long this one takes; polls before that are wasted 404s
+            self.stop_event.wait(min(timeout, max(0.0, requested_at + 0.75 * self._wav_convert_time - time.monotonic())))
         while time.monotonic() < deadline and not self.is_stopped():
+            retry_after = None
             try:
-                resp = requests.get(detail_url, headers=headers, timeout=15)
-                if resp.status_code == 404:
-                    time.sleep(interval)
-                    continue
-                resp.raise_for_status()
-                data = resp.json()
-                wav_url = self._find_wav_url(data)
-                if wav_url:
-                    return wav_url
+                resp = self.session.get(detail_url, timeout=15)
+                if resp.status_code in (404, 429):
+                    # Not ready / too many polls: the server may say exactly when to come back
+                    retry_after = self._parse_retry_after(resp.headers.get("Retry-After"))
+                else:
+                    resp.raise_for_status()
+                    data = parse_json(resp.content)
+                    wav_url = self._find_wav_url(data)
+                    if wav_url:
+                        if requested_at is not None:
+                            self._record_wav_convert_time(time.monotonic() - requested_at)
+                        return wav_url
             except requests.HTTPError as http_err:
-                status = http_err.response.status_code if http_err.response else "?"
-                if status != 404:
-                    self._log(f"WAV status check failed ({status}): {http_err}", "info")
+                status = http_err.response.status_code if http_err.response is not None else "?"
+                self._log(f"WAV status check failed ({status}): {http_err}", "info")
             except Exception as exc:
                 self._log(f"WAV status check failed: {exc}", "info")
-            time.sleep(interval)
+            if retry_after is not None:
+                delay = retry_after
+            else:
+                # Full jitter keeps parallel conversions from polling in lockstep; waking on stop
+                delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+                attempt = min(attempt + 1, 5)
+            self.stop_event.wait(min(delay, max(0.0, deadline - time.monotonic())))
         if self.is_stopped():
             self._log("WAV polling aborted.", "info")
         else:
             self._log("WAV conversion timed out.", "error")
         return None
 
-    def _extract_extension_from_url(self, url, default=".mp3"):
+    def _record_wav_convert_time(self, elapsed):
+        previous = self._wav_convert_time
+        self._wav_convert_time = elapsed if previous is None else 0.7 * previous + 0.3 * elapsed
+
+    @staticmethod
+    def _parse_retry_after(value):
+        """Return a Retry-After header in seconds, or None if it is missing or an HTTP date."""
         try:
-            path = urlparse(url).path
-            ext = os.path.splitext(path)[1]
-            return ext.lower() if ext else default
-        except:
-            return default
+            return max(0.0, float(value))
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _extract_extension_from_url(url, default=".mp3"):
+        """Lowercased extension of the URL's path (query/fragment ignored), or default."""
+        end = len(url)
+        for sep in "?#":
+            i = url.find(sep)
+            if 0 <= i < end:
+                end = i
+        scheme = url.find("://", 0, end)
+        start = url.find("/", scheme + 3 if scheme >= 0 else 0, end)
+        if start < 0:
+            return default  # No path at all
+        dot = url.rfind(".", start, end)
+        return url[dot:end].lower() if dot > url.rfind("/", start, end) else default
 
     def fetch_thumbnail_bytes(self, url, size=40):
+        """Return a size x size PNG thumbnail for url, from the in-memory LRU when possible."""
+        key = (url, size)
+        with self._thumb_lock:
+            data = self._thumb_cache.get(key)
+            if data is not None:
+                self._thumb_cache.move_to_end(key)
+                return data
+            # Stems and versions share art: songs queued together would all miss and fetch it at once
+            pending = self._thumb_pending.get(key)
+            if pending is None:
+                self._thumb_pending[key] = Future()
+        if pending is not None:
+            return pending.result()
+
+        data = None
         try:
-            from io import BytesIO
-            from PIL import Image
-            resp = requests.get(url, timeout=8)
-            resp.raise_for_status()
-            img = Image.open(BytesIO(resp.content))
-            img = img.resize((size, size), Image.Resampling.LANCZOS)
+            data = self._load_thumbnail(url, size)
+        finally:
+            with self._thumb_lock:
+                if data is not None:  # Failures aren't cached, so a later call can retry
+                    self._thumb_cache[key] = data
+                    self._thumb_cache.move_to_end(key)
+                    while len(self._thumb_cache) > THUMB_CACHE_SIZE:
+                        self._thumb_cache.popitem(last=False)
+                self._thumb_pending.pop(key).set_result(data)
+        return data
+
+    def _load_thumbnail(self, url, size):
+        """Thumbnail from the disk cache (revalidated when stale) or the network."""
+        path = self._thumb_cache_path(url, size)
+        data = self._read_thumb_file(path)
+        if data is None:
+            data = self._download_thumbnail(url, size, path)
+        elif self._thumb_is_stale(path):
+            # Revalidate with a conditional GET; None means 304 or failure: keep the cached copy
+            data = self._download_thumbnail(url, size, path, revalidate=True) or data
+        return data
+
+    def _thumb_cache_path(self, url, size):
+        """On-disk cache file for a thumbnail, or None when the disk cache is disabled."""
+        if not self.thumb_cache_dir:
+            return None
+        key = hashlib.sha1(f"{url}|{size}".encode("utf-8")).hexdigest()
+        return os.path.join(self.thumb_cache_dir, key + ".png")
+
+    @staticmethod
+    def _read_thumb_file(path):
+        if not path:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _thumb_is_stale(path):
+        try:
+            return time.time() - os.path.getmtime(path) > THUMB_MAX_AGE
+        except OSError:
+            return False
+
+    @staticmethod
+    def _write_thumb_file(path, data, validators):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"  # Unique per thread: two downloads may race
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            if validators:
+                save_json(path + ".json", validators)
+        except OSError as e:
+            print(f"Could not cache thumbnail {path}: {e}")
+
+    def _download_thumbnail(self, url, size, cache_path=None, revalidate=False):
+        """
+        Download and resize a thumbnail, storing it at cache_path if given.
+        With revalidate=True this is a conditional GET against the cached file's ETag/Last-Modified.
+        """
+        # Thumbnails come from whatever host image_url names: don't send it the session's token
+        headers = {"Authorization": None}
+        if revalidate:
+            try:
+                validators = load_json(cache_path + ".json")
+            except Exception:
+                validators = {}
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+        try:
+            # Streamed with a size cap, and closed by the with-block so the connection returns to the pool
+            with self.session.get(url, headers=headers, timeout=8, stream=True) as resp:
+                if resp.status_code == 304:
+                    os.utime(cache_path)  # Still current: fresh for another THUMB_MAX_AGE
+                    return None
+                resp.raise_for_status()
+                if int(resp.headers.get("Content-Length") or 0) > THUMB_MAX_BYTES:
+                    return None
+                resp.raw.decode_content = True
+                body = resp.raw.read(THUMB_MAX_BYTES + 1)
+        except (requests.RequestException, OSError) as e:
+            print(f"Thumbnail failed for {url}: {e}")
+            return None
+        if len(body) > THUMB_MAX_BYTES:
+            return None
+        try:
+            img = Image.open(BytesIO(body))
+            if img.width * img.height > THUMB_MAX_PIXELS:
+                return None  # Decompression bomb: the header alone is enough to reject it
+            if img.format == "JPEG":
+                # Let libjpeg decode at 1/2..1/8 scale instead of full resolution (covers are ~1000 px)
+                img.draft("RGB", (size * 2, size * 2))
+            # reducing_gap shrinks by whole factors with a cheap box filter first (PNG/WebP covers get no draft)
+            img = img.resize((size, size), Image.Resampling.LANCZOS, reducing_gap=2.0)
             buffer = BytesIO()
             img.save(buffer, format="PNG")
-            return buffer.getvalue()
-        except:
+            data = buffer.getvalue()
+        except Exception as e:
+            # Truncated or odd images fail in many ways (OSError, EOFError, KeyError, struct.error...): no thumbnail
+            print(f"Thumbnail failed for {url}: {e}")
             return None
+        if cache_path:
+            validators = {
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+            }
+            self._write_thumb_file(cache_path, data, validators if any(validators.values()) else None)
+        return data
 
@@ -141,6 +141,9 @@ def create_scraping_card(parent, app):
 
     app.rate_limit_var = tk.DoubleVar(value=0.5)
     add_input(row, "Delay (s)", app.rate_limit_var, width=5, tooltip="Seconds between downloads")
+
+    app.workers_var = tk.IntVar(value=3)
+    add_input(row, "Threads", app.workers_var, width=3, tooltip="Songs downloaded in parallel (1-8)")
     
     app.start_page_var = tk.IntVar(value=1)
     add_input(row, "Start Page", app.start_page_var, width=5, tooltip="Page to start from")
@@ -1,14 +1,22 @@
 import os
 import re
+import json
 import time
 import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import math
 from mutagen.id3 import ID3, APIC, TIT2, TPE1, TCON, COMM, TDRC, TYER, USLT, TXXX, error
 from mutagen.mp3 import MP3
 from mutagen.wave import WAVE
 import platform
 import subprocess
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 
 def open_file(path):
@@ -24,6 +32,53 @@ def open_file(path):
         print(f"Error opening file: {e}")
 
 
+def load_json(path):
+    """Load a JSON file, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def parse_json(data):
+    """Parse a JSON document from bytes or str (e.g. an HTTP response body), using orjson when installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def save_json(path, data, indent=False):
+    """
+    Write data to a JSON file, using orjson when it is installed.
+    The file is written to a temporary sibling and swapped in, so readers never see a partial file.
+    """
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"  # Unique per thread: two writers may race
+    try:
+        if ORJSON_AVAILABLE:
+            option = orjson.OPT_INDENT_2 if indent else 0
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(data, option=option))
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2 if indent else None, separators=None if indent else (',', ':'))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def normalize_tag_keys(tags):
+    """Return tags with filepath keys passed through os.path.normpath (UUID keys are left alone)."""
+    return {
+        (os.path.normpath(key) if ('/' in key or '\\' in key) else key): value
+        for key, value in tags.items()
+    }
+
+
 def get_uuid_from_file(filepath):
     """
     Extract SUNO_UUID from audio file metadata.
@@ -62,13 +117,21 @@ def build_uuid_cache(directory):
     if not os.path.exists(directory):
         return uuid_cache
     
-    for root, dirs, files in os.walk(directory):
-        for filename in files:
-            if filename.lower().endswith(('.mp3', '.wav')):
-                filepath = os.path.join(root, filename)
-                uuid = get_uuid_from_file(filepath)
-                if uuid:
-                    uuid_cache.add(uuid)
+    # os.scandir reuses the directory entry's file type, so no extra stat per file
+    pending = [directory]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name.lower().endswith(('.mp3', '.wav')):
+                    uuid = get_uuid_from_file(entry.path)
+                    if uuid:
+                        uuid_cache.add(uuid)
     
     return uuid_cache
 
@@ -199,7 +262,7 @@ def save_lyrics_to_file(filepath, lyrics):
     return False, "Unknown error or invalid file type"
 
 
-FILENAME_BAD_CHARS = r'[<>:"/\\|?*\x00-\x1F]'
+FILENAME_BAD_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1F]')
 
 
 def hex_to_rgb(color):
@@ -228,7 +291,7 @@ def lighten_color(color, amount=0.1):
 
 
 def sanitize_filename(name, maxlen=200):
-    safe = re.sub(FILENAME_BAD_CHARS, "_", name)
+    safe = FILENAME_BAD_CHARS.sub("_", name)
     safe = safe.strip(" .")
     return safe[:maxlen] if len(safe) > maxlen else safe
 
@@ -246,41 +309,73 @@ def get_unique_filename(filename):
 
 
 def get_downloaded_uuids(directory):
-    uuids = set()
-    if not os.path.exists(directory):
-        return uuids
-
-    for root, dirs, files in os.walk(directory):
-        for fname in files:
-            if fname.lower().endswith(".mp3"):
-                try:
-                    audio = ID3(os.path.join(root, fname))
-                    for frame in audio.getall("TXXX"):
-                        if frame.desc == "SUNO_UUID":
-                            uuids.add(frame.text[0])
-                except:
-                    pass
-    return uuids
+    """Set of SUNO_UUIDs of the songs under directory (kept for callers of the old name)."""
+    return build_uuid_cache(directory)
 
 
 class RateLimiter:
-    """Simple token-style rate limiter that enforces a minimum delay between calls."""
+    """
+    Thread-safe token bucket: on average one call per min_interval, with bursts of up to `burst` calls.
+    Callers reserve their slot under the lock and sleep outside it, so waiting threads don't serialize.
+    """
+
+    MAX_INTERVAL = 60.0
+    SNAP_INTERVAL = 0.05  # relax() returns to the configured interval once within this many seconds of it
 
-    def __init__(self, min_interval=0.0):
+    def __init__(self, min_interval=0.0, burst=1):
         self.min_interval = max(0.0, float(min_interval))
+        self._floor = self.min_interval  # Configured interval that relax() returns to
+        self.burst = max(1, int(burst))
         self._lock = threading.Lock()
-        self._next_allowed = time.monotonic()
-
-    def wait(self):
-        if self.min_interval <= 0:
-            return
-        with self._lock:
-            now = time.monotonic()
-            delay = self._next_allowed - now
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        if self.min_interval > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) / self.min_interval)
+        self._updated = now
+
+    def wait(self, stop_event=None):
+        """Block until a call is allowed. Returns False (early) if stop_event is set: skip the call then."""
+        if self.min_interval > 0:
+            with self._lock:
+                self._refill(time.monotonic())
+                self._tokens -= 1  # May go negative: the debt is this caller's wait
+                delay = -self._tokens * self.min_interval
             if delay > 0:
-                time.sleep(delay)
-                now = time.monotonic()
-            self._next_allowed = now + self.min_interval
+                if stop_event is None:
+                    time.sleep(delay)
+                elif stop_event.wait(delay):
+                    return False
+        return stop_event is None or not stop_event.is_set()
+
+    def backoff(self, retry_after=None):
+        """Slow down after a 429: double the interval and honor the server's Retry-After seconds."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.min_interval = min(self.MAX_INTERVAL, max(self.min_interval * 2, 1.0, retry_after or 0))
+            pause = retry_after if retry_after else self.min_interval
+            # Empty the bucket so the next call waits out the pause
+            self._tokens = min(self._tokens, 1 - pause / self.min_interval)
+
+    def relax(self):
+        """After a successful request, halve a backed-off interval back towards the configured one."""
+        with self._lock:
+            if self.min_interval > self._floor:
+                self._refill(time.monotonic())
+                relaxed = self.min_interval / 2
+                # Halving never reaches a floor of 0 on its own: snap the last few ms
+                self.min_interval = self._floor if relaxed - self._floor < self.SNAP_INTERVAL else relaxed
+
+
+def create_http_session(pool_maxsize=16):
+    """Create a requests Session with pooled keep-alive connections and retries on gateway errors."""
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_maxsize, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 
 def embed_metadata(
@@ -297,12 +392,14 @@ def embed_metadata(
     token=None,
     timeout=15,
     metadata_options=None,
+    session=None,
 ):
     """
     Embed metadata into MP3 or WAV files.
     
     metadata_options: dict with keys 'title', 'artist', 'genre', 'year', 
                      'comment', 'lyrics', 'album_art', 'uuid' (all bool)
+    session: optional requests Session used to fetch the album art (reuses its pooled connections)
     """
     if metadata_options is None:
         # Default: include all metadata
@@ -331,7 +428,7 @@ def embed_metadata(
         image_bytes = None
         mime = "image/jpeg"
         if metadata_options.get('album_art', True) and image_url:
-            r = requests.get(image_url, headers=headers, timeout=timeout)
+            r = (session or requests).get(image_url, headers=headers, timeout=timeout)
             if r.status_code == 200:
                 image_bytes = r.content
                 mime = r.headers.get("Content-Type", "image/jpeg").split(";")[0]